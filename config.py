@@ -4,12 +4,17 @@
 
 task-logger.py と transcript-analyzer.py で共有する定数とユーティリティ関数
 """
+import errno
+import functools
 import os
 import re
+import stat
+import string
 import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Sequence
 
 # =============================================================================
 # 定数
@@ -22,13 +27,20 @@ USER_PROMPTS_FILE = ".claude/logs/agents/user_prompts.jsonl"
 # transcript 解析設定
 MAX_CONTENT_LENGTH = 1000  # ツール結果の最大表示長
 MAX_TOOL_RESULT_LENGTH = 500  # Markdown 内のツール結果の最大表示長
+REDACT_LOOKAHEAD_LENGTH = 256  # 切り詰め前にマスキングする際、最大表示長を超えて残す文字数（境界をまたぐ機密情報の検出用）
 MAX_EVENTS = 1000  # 最大イベント数
 MAX_FILE_SIZE_MB = 10  # 最大ファイルサイズ（MB）
 MAX_PROMPT_LENGTH = 500  # プロンプトの最大保存長
+LOG_WRITE_BUFFER_BYTES = 64 * 1024  # Markdown ログをまとめて書き込む単位（バイト）
 
 # キャッシュ設定
 CACHE_TTL_HOURS = 24  # 古いキャッシュエントリの保持期間（時間）
+SESSION_CACHE_COMPACT_BYTES = 256 * 1024  # セッションキャッシュを圧縮するサイズ（バイト）
+SUBAGENT_LOG_CACHE_SIZE = 256  # サブエージェントログ最終結果キャッシュの最大件数
 STALE_LOCK_TIMEOUT_SEC = 60  # ロックファイルが古いと判断する秒数
+LOCK_RETRY_DELAY_MIN_SEC = 0.01  # ロック再試行の初期待機（秒）
+LOCK_RETRY_DELAY_MAX_SEC = 0.05  # ロック再試行の最大待機（秒）
+ATOMIC_APPEND_MAX_BYTES = 4096  # O_APPEND の単一 write でロックなし追記する最大サイズ（PIPE_BUF）
 
 # 親transcript読み込み制限（パフォーマンス対策）
 MAX_PARENT_TRANSCRIPT_MB = 5  # 親transcript最大サイズ（MB）
@@ -68,23 +80,47 @@ def _get_secure_cache_dir() -> Path:
     return cache_dir
 
 _SECURE_CACHE_DIR = _get_secure_cache_dir()
-SESSION_CACHE_FILE = _SECURE_CACHE_DIR / "sessions.json"
+SESSION_CACHE_FILE = _SECURE_CACHE_DIR / "sessions.jsonl"  # 追記型（1行1エントリ）
 SESSION_CACHE_LOCK = _SECURE_CACHE_DIR / "sessions.lock"
 INDEX_LOCK_SUFFIX = ".lock"  # index.jsonl用ロックファイルサフィックス
+INDEX_OFFSETS_SUFFIX = ".idx"  # index.jsonl用オフセット索引ファイルサフィックス
+LOG_TMP_SUFFIX = ".tmp"  # 公開（index.jsonl への登録）前の Markdown ログのサフィックス
 
 
 # =============================================================================
 # ユーティリティ関数
 # =============================================================================
+# ファイル名・ブランチ名サニタイズ用パターン
+_SANITIZE_BAD_CHARS_RE = re.compile(r'[^a-zA-Z0-9_-]')
+_SANITIZE_UNDERSCORES_RE = re.compile(r'_+')
+
+
+class _BranchTranslateTable(dict):
+    """英数字以外（非ASCII文字を含む）をすべてハイフンに変換する str.translate 用テーブル"""
+
+    def __missing__(self, codepoint: int) -> str:
+        return "-"
+
+
+# 英数字のみそのまま残す
+_BRANCH_TRANSLATE_TABLE = _BranchTranslateTable(
+    {ord(c): c for c in string.ascii_letters + string.digits}
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_project_root() -> Path:
-    """プロジェクトルートを取得"""
+    """プロジェクトルートを取得（プロセス内で不変のためキャッシュ）"""
     return Path(os.environ.get("CLAUDE_PROJECT_DIR", "."))
 
 
+@functools.lru_cache(maxsize=256)
 def sanitize_filename(name: str) -> str:
     """
     ファイル名として安全な文字列に変換
 
+    同じサブエージェント名が繰り返し渡されるため結果をキャッシュする。
+
     Args:
         name: サニタイズする文字列
 
@@ -92,19 +128,22 @@ def sanitize_filename(name: str) -> str:
         安全なファイル名文字列
     """
     # 英数字、ハイフン、アンダースコアのみ許可
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', name)
+    sanitized = _SANITIZE_BAD_CHARS_RE.sub('_', name)
     # 先頭のドットを除去（隠しファイル防止）
     sanitized = sanitized.lstrip('.')
     # 連続するアンダースコアを1つに
-    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = _SANITIZE_UNDERSCORES_RE.sub('_', sanitized)
     # 空文字列の場合はデフォルト値
     return sanitized[:50] or "unknown"  # 最大50文字
 
 
+@functools.lru_cache(maxsize=256)
 def sanitize_branch_name(branch: str) -> str:
     """
     ブランチ名をディレクトリ名として安全な文字列に変換
 
+    同じブランチ名が繰り返し渡されるため結果をキャッシュする。
+
     Args:
         branch: ブランチ名（例: "feature/some-feature", "develop"）
 
@@ -113,16 +152,9 @@ def sanitize_branch_name(branch: str) -> str:
     """
     if not branch:
         return "unknown"
-    # スラッシュをハイフンに変換
-    sanitized = branch.replace("/", "-")
-    # 英数字、ハイフン、アンダースコアのみ許可
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', sanitized)
-    # 先頭のドットを除去
-    sanitized = sanitized.lstrip('.')
-    # 連続するハイフン/アンダースコアを1つに
-    sanitized = re.sub(r'[-_]+', '-', sanitized)
-    # 先頭・末尾のハイフンを除去
-    sanitized = sanitized.strip('-')
+    # 英数字以外（スラッシュ・ドット・アンダースコア等）をハイフンに変換し、
+    # 連続するハイフンの集約と先頭・末尾のハイフン除去を分割・結合で同時に行う
+    sanitized = "-".join(filter(None, branch.translate(_BRANCH_TRANSLATE_TABLE).split("-")))
     # 空文字列の場合はデフォルト値
     return sanitized[:50] or "unknown"
 
@@ -160,6 +192,24 @@ SENSITIVE_PATTERNS: list[tuple[str, str]] = [
 ]
 
 
+# コンパイル済みパターン（呼び出しごとの re キャッシュ参照を避ける）
+# 前のパターンの置換結果に後のパターンを適用するため、リスト順に1パターンずつ適用する
+# （1つの選択パターンに結合すると位置の早い一致が後続の機密情報を飲み込み、マスキング漏れが生じる）
+_COMPILED_SENSITIVE_PATTERNS: list[tuple[re.Pattern[str], str]] = [
+    (re.compile(pattern), replacement) for pattern, replacement in SENSITIVE_PATTERNS
+]
+
+# 事前判定用リテラル（SENSITIVE_PATTERNS の各パターンが必ず含む文字列）
+# いずれも含まないテキストはパターン照合を省略する
+# SENSITIVE_PATTERNS にパターンを追加した場合はここにも追加すること
+_SENSITIVE_PREFILTER_RE = re.compile(
+    r'api|token|bearer|passw|pwd|secret|private|encryption|authorization'
+    r'|sk-|sk_live_|pk_live_|ghp_|gho_|akia|eyj|aiza|sbp_|service_role'
+    r'|hooks\.slack\.com|discord',
+    re.IGNORECASE
+)
+
+
 def redact_sensitive_data(text: str) -> str:
     """
     テキスト内の機密情報をマスキング
@@ -176,19 +226,167 @@ def redact_sensitive_data(text: str) -> str:
     if not text:
         return text
 
+    # 機密情報の手がかりとなる文字列が無ければそのまま返す
+    if not _SENSITIVE_PREFILTER_RE.search(text):
+        return text
+
     result = text
-    for pattern, replacement in SENSITIVE_PATTERNS:
-        result = re.sub(pattern, replacement, result)
+    for pattern, replacement in _COMPILED_SENSITIVE_PATTERNS:
+        result = pattern.sub(replacement, result)
 
     return result
 
 
-def is_safe_path(path: str, allowed_prefixes: list[str]) -> bool:
+# マスキング前の切り捨て位置（空白）の検索用
+_WHITESPACE_RE = re.compile(r"\s")
+
+
+def redact_head(
+    text: str,
+    max_length: int,
+    transform: Callable[[str], str] | None = None
+) -> tuple[str, bool]:
+    """
+    テキストの先頭 max_length 文字分を機密情報マスキング（・変換）して返す
+
+    表示上限を大きく超える部分はマスキング前に切り捨て、捨てる部分の
+    正規表現走査を省く。切り捨ては上限から REDACT_LOOKAHEAD_LENGTH 文字先の
+    空白位置で行う（マスキング対象の値は空白を含まないため、途中で分断されて
+    検出漏れになることがない）。マスキングで短くなり上限に満たない場合は
+    全体を処理し直す。
+
+    Args:
+        text: 対象テキスト
+        max_length: 最大表示長
+        transform: マスキング後に適用する変換（例: コードブロックのエスケープ）
+
+    Returns:
+        (処理後のテキスト, 切り詰めたか) のタプル
+    """
+    if len(text) > max_length + REDACT_LOOKAHEAD_LENGTH:
+        boundary = _WHITESPACE_RE.search(text, max_length + REDACT_LOOKAHEAD_LENGTH)
+        if boundary is not None:
+            head = redact_sensitive_data(text[:boundary.start()])
+            if transform is not None:
+                head = transform(head)
+            if len(head) >= max_length:
+                return head[:max_length], True
+
+    text = redact_sensitive_data(text)
+    if transform is not None:
+        text = transform(text)
+    if len(text) > max_length:
+        return text[:max_length], True
+    return text, False
+
+
+def _flat_realpath(filename: str) -> str:
+    """
+    os.path.realpath の POSIX 向け非再帰実装（Python 3.13 の実装を移植）
+
+    Python 3.12 以前の posixpath.realpath は再帰的に path を結合しながら
+    解決するため、コンポーネント数に比例した関数呼び出しと文字列生成が発生する。
+    未解決コンポーネントをスタックで管理し、1コンポーネントにつき
+    lstat 1回で解決する。解決済みシンボリックリンクはキャッシュして再利用する。
+
+    Args:
+        filename: 解決するパス
+
+    Returns:
+        シンボリックリンクを解決した絶対パス
+    """
+    sep = "/"
+    # 未解決コンポーネントのスタック（None はシンボリックリンク解決完了の印）
+    rest: list[str | None] = filename.split(sep)[::-1]
+    part_count = len(rest)
+    path = sep if filename.startswith(sep) else os.getcwd()
+    # シンボリックリンクのパス -> 解決済みパス（解決中は None、ループ検出に使用）
+    seen: dict[str, str | None] = {}
+
+    while part_count:
+        name = rest.pop()
+        if name is None:
+            # シンボリックリンクの参照先を解決し終えた
+            seen[rest.pop()] = path
+            continue
+        part_count -= 1
+        if not name or name == ".":
+            continue
+        if name == "..":
+            path = path[:path.rindex(sep)] or sep
+            continue
+        newpath = path + name if path == sep else path + sep + name
+        try:
+            st = os.lstat(newpath)
+            if not stat.S_ISLNK(st.st_mode):
+                path = newpath
+                continue
+            if newpath in seen:
+                # 解決済みならキャッシュを使用、解決中ならループのためそのまま進む
+                cached = seen[newpath]
+                path = cached if cached is not None else newpath
+                continue
+            target = os.readlink(newpath)
+        except OSError:
+            path = newpath
+            continue
+        seen[newpath] = None
+        if target.startswith(sep):
+            path = sep
+        rest.append(newpath)
+        rest.append(None)
+        target_parts = target.split(sep)[::-1]
+        rest.extend(target_parts)
+        part_count += len(target_parts)
+
+    return path
+
+
+# Python 3.13 以降と Windows は標準実装を使用
+if sys.platform == "win32" or sys.version_info >= (3, 13):
+    _realpath = os.path.realpath
+else:
+    _realpath = _flat_realpath
+
+
+@functools.lru_cache(maxsize=128)
+def _resolve_allowed_prefixes(allowed_prefixes: tuple[str, ...]) -> tuple[frozenset[str], tuple[str, ...]]:
+    """
+    許可プレフィックスを解決し、比較用の形に変換（結果をキャッシュ）
+
+    許可ディレクトリはプロセス内でほぼ固定のため、realpath の
+    コンポーネントごとの lstat や正規化は初回のみに抑える。
+    Windows では大文字小文字を無視するため小文字化しておく。
+
+    Args:
+        allowed_prefixes: 許可されたディレクトリのタプル
+
+    Returns:
+        (完全一致用の集合, 前方一致用のセパレータ付きプレフィックスのタプル)
+    """
+    exact: set[str] = set()
+    with_sep: list[str] = []
+    for prefix in allowed_prefixes:
+        abs_prefix = _realpath(os.path.normpath(prefix))
+        # パスの末尾にセパレータを付けて完全一致を確認
+        # (例: /tmp/test が /tmp/testing にマッチしないように)
+        prefix_with_sep = abs_prefix.rstrip(os.sep) + os.sep
+        if sys.platform == "win32":
+            abs_prefix = abs_prefix.lower()
+            prefix_with_sep = prefix_with_sep.lower()
+        exact.add(abs_prefix)
+        with_sep.append(prefix_with_sep)
+    return frozenset(exact), tuple(with_sep)
+
+
+def is_safe_path(path: str, allowed_prefixes: Sequence[str]) -> bool:
     """
     パスが許可されたプレフィックス内にあるか検証
 
     シンボリックリンクを解決し、ディレクトリトラバーサル攻撃を防ぐ。
     Windows では大文字小文字を無視して比較する。
+    解決するのは検証対象のパスのみで、許可プレフィックス側は
+    一度解決した結果を再利用する（タプルで渡すとそのままキャッシュキーになる）。
 
     Args:
         path: 検証するパス
@@ -198,28 +396,15 @@ def is_safe_path(path: str, allowed_prefixes: list[str]) -> bool:
         安全な場合True
     """
     try:
+        exact, with_sep = _resolve_allowed_prefixes(tuple(allowed_prefixes))
+
         # シンボリックリンクを解決して絶対パスを取得
-        abs_path = os.path.realpath(os.path.normpath(path))
-
-        for prefix in allowed_prefixes:
-            abs_prefix = os.path.realpath(os.path.normpath(prefix))
-            # パスの末尾にセパレータを付けて完全一致を確認
-            # (例: /tmp/test が /tmp/testing にマッチしないように)
-            prefix_with_sep = abs_prefix.rstrip(os.sep) + os.sep
-
-            if sys.platform == "win32":
-                # Windows では大文字小文字を無視
-                if abs_path.lower() == abs_prefix.lower():
-                    return True
-                if abs_path.lower().startswith(prefix_with_sep.lower()):
-                    return True
-            else:
-                if abs_path == abs_prefix:
-                    return True
-                if abs_path.startswith(prefix_with_sep):
-                    return True
+        abs_path = _realpath(os.path.normpath(path))
+        if sys.platform == "win32":
+            # Windows では大文字小文字を無視
+            abs_path = abs_path.lower()
 
-        return False
+        return abs_path in exact or abs_path.startswith(with_sep)
     except Exception:
         return False
 
@@ -228,25 +413,26 @@ def cleanup_old_cache_entries(cache: dict[str, Any]) -> dict[str, Any]:
     """
     古いキャッシュエントリを削除
 
+    start_ts は datetime.now().isoformat() 形式で保存されているため、
+    日時として解析せず文字列比較で判定する（ISO 8601 は辞書順 = 時刻順）。
+
     Args:
         cache: セッションキャッシュ
 
     Returns:
         クリーンアップ後のキャッシュ
     """
-    now = datetime.now()
-    cutoff = now - timedelta(hours=CACHE_TTL_HOURS)
+    cutoff_str = (datetime.now() - timedelta(hours=CACHE_TTL_HOURS)).isoformat()
 
     cleaned: dict[str, Any] = {}
     for key, value in cache.items():
         try:
             start_ts_str = value.get("start_ts", "")
-            if start_ts_str:
-                start_ts = datetime.fromisoformat(start_ts_str)
-                if start_ts > cutoff:
-                    cleaned[key] = value
-        except (ValueError, TypeError, AttributeError):
-            # パース失敗したエントリは削除
+            # ISO 8601 形式でないエントリは削除
+            if start_ts_str[10:11] == "T" and start_ts_str > cutoff_str:
+                cleaned[key] = value
+        except (TypeError, AttributeError):
+            # 不正な形式のエントリは削除
             pass
 
     return cleaned
@@ -255,14 +441,31 @@ def cleanup_old_cache_entries(cache: dict[str, Any]) -> dict[str, Any]:
 # =============================================================================
 # ファイルロック（クロスプラットフォーム）
 # =============================================================================
+# OS のアドバイザリロック（Unix: fcntl.flock / Windows: msvcrt.locking）
+if sys.platform == "win32":
+    import msvcrt
+    fcntl = None
+else:
+    msvcrt = None
+    try:
+        import fcntl
+    except ImportError:
+        # fcntl が無い環境では排他作成方式のロックファイルにフォールバック
+        fcntl = None
+
+
 class FileLock:
     """
     シンプルなファイルロック実装（標準ライブラリのみ使用）
 
+    ロックファイルに対する OS のアドバイザリロックを使用する。
+    ロックはプロセス終了時に OS が解放するため、古いロックが残らない。
+
     プラットフォーム動作の違い:
-        - Unix: ロックファイルは即座に削除される
-        - Windows: ファイルハンドルを閉じた後、削除前に 10ms 待機する
-          （ファイルシステムの遅延によるエラーを回避）
+        - Unix: fcntl.flock でロック（ロックファイルは削除せず再利用）
+        - Windows: msvcrt.locking で先頭1バイトをロック（同上）
+        - どちらも使えない環境: O_CREAT | O_EXCL によるロックファイルの
+          排他作成にフォールバック（解放時に削除、古いロックは mtime で判定）
 
     使用例:
         with FileLock(lock_path):
@@ -271,8 +474,10 @@ class FileLock:
 
     def __init__(self, lock_path: str | Path, timeout: float = 10.0):
         self.lock_path = Path(lock_path)
+        self._lock_path_str = str(self.lock_path)
         self.timeout = timeout
         self._lock_file = None
+        self._dir_ready = False  # ロックファイルの親ディレクトリ作成済みか
 
     def __enter__(self):
         self.acquire()
@@ -284,16 +489,90 @@ class FileLock:
 
     def acquire(self) -> None:
         """ロックを取得"""
-        import time
+        # 同じインスタンスを再利用する場合、親ディレクトリの作成は初回のみ
+        if not self._dir_ready:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self._dir_ready = True
+        if fcntl is None and msvcrt is None:
+            self._acquire_exclusive_create()
+        else:
+            self._acquire_os_lock()
 
-        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
-        start_time = time.time()
+    def release(self) -> None:
+        """ロックを解放"""
+        # まず参照をクリア（他のスレッドからの二重解放を防ぐ）
+        lock_file = self._lock_file
+        self._lock_file = None
+
+        if fcntl is None and msvcrt is None:
+            self._release_exclusive_create(lock_file)
+            return
+
+        if lock_file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                os.lseek(lock_file, 0, os.SEEK_SET)
+                msvcrt.locking(lock_file, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        try:
+            os.close(lock_file)
+        except OSError:
+            pass
+
+    def _try_os_lock(self, fd: int) -> bool:
+        """ノンブロッキングでロックを試行（取得できた場合True）"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except (BlockingIOError, PermissionError):
+            return False
+        except OSError as e:
+            # Windows の msvcrt.locking は競合時に EACCES / EDEADLK を返す
+            if e.errno in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+                return False
+            raise
+
+    def _acquire_os_lock(self) -> None:
+        """OS のアドバイザリロックで取得"""
+        fd = os.open(self._lock_path_str, os.O_RDWR | os.O_CREAT, 0o600)
+        # 経過時間は時計の巻き戻りの影響を受けない monotonic で計測
+        start_time = time.monotonic()
+        retry_delay = LOCK_RETRY_DELAY_MIN_SEC
+
+        try:
+            # flock にはタイムアウト指定が無いため、競合時のみ待機を挟んで再試行
+            # （1回の試行は1システムコールのみ）
+            while not self._try_os_lock(fd):
+                if time.monotonic() - start_time > self.timeout:
+                    raise TimeoutError(f"Failed to acquire lock: {self.lock_path}")
+                # 待機間隔を 10ms から 50ms まで段階的に延ばす（長い待機での起床回数削減）
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, LOCK_RETRY_DELAY_MAX_SEC)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._lock_file = fd
+
+    def _acquire_exclusive_create(self) -> None:
+        """ロックファイルの排他作成で取得（フォールバック）"""
+        # 経過時間は時計の巻き戻りの影響を受けない monotonic で計測
+        start_time = time.monotonic()
+        retry_delay = LOCK_RETRY_DELAY_MIN_SEC
 
         while True:
             try:
                 # O_CREAT | O_EXCL で排他的に作成
                 fd = os.open(
-                    str(self.lock_path),
+                    self._lock_path_str,
                     os.O_CREAT | os.O_EXCL | os.O_WRONLY
                 )
                 self._lock_file = fd
@@ -302,16 +581,17 @@ class FileLock:
                 return
             except FileExistsError:
                 # ロックファイルが既に存在する場合
-                if time.time() - start_time > self.timeout:
+                if time.monotonic() - start_time > self.timeout:
                     # タイムアウト: 古いロックファイルを強制削除
                     try:
                         # ロックファイルが古すぎる場合はリネームしてから削除（TOCTOU対策）
-                        mtime = self.lock_path.stat().st_mtime
+                        # mtime は壁時計基準のため time.time() と比較する
+                        mtime = os.stat(self._lock_path_str).st_mtime
                         if time.time() - mtime > STALE_LOCK_TIMEOUT_SEC:
                             # アトミックにリネームしてから削除
                             stale_path = self.lock_path.with_suffix(".stale")
                             try:
-                                os.rename(str(self.lock_path), str(stale_path))
+                                os.rename(self._lock_path_str, str(stale_path))
                                 stale_path.unlink(missing_ok=True)
                             except FileNotFoundError:
                                 # 他のプロセスが既に削除した
@@ -323,26 +603,38 @@ class FileLock:
                     except Exception:
                         pass
                     raise TimeoutError(f"Failed to acquire lock: {self.lock_path}")
-                time.sleep(0.01)  # 10ms待機
-
-    def release(self) -> None:
-        """ロックを解放"""
-        # まず参照をクリア（他のスレッドからの二重解放を防ぐ）
-        lock_file = self._lock_file
-        self._lock_file = None
+                # 待機間隔を 10ms から 50ms まで段階的に延ばす（長い待機での起床回数削減）
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, LOCK_RETRY_DELAY_MAX_SEC)
 
+    def _release_exclusive_create(self, lock_file: int | None) -> None:
+        """排他作成したロックファイルを閉じて削除（フォールバック）"""
         if lock_file is not None:
             try:
                 os.close(lock_file)
             except Exception:
                 pass
 
-        # Windows ではファイルハンドルを閉じた後、削除前に少し待機
-        if sys.platform == "win32":
-            import time
-            time.sleep(0.01)  # 10ms
-
         try:
             self.lock_path.unlink(missing_ok=True)
         except Exception:
             pass
+
+
+@functools.lru_cache(maxsize=16)
+def get_file_lock(lock_path: str | Path, timeout: float = 10.0) -> FileLock:
+    """
+    ロックファイルのパスごとに FileLock を1つだけ生成して再利用
+
+    FileLock は解放後に再取得できるため、同じプロセス内で同じロックを
+    繰り返し取得する場合もインスタンスを作り直さない。
+    （再入はできないため、取得中に同じロックを取得しないこと）
+
+    Args:
+        lock_path: ロックファイルのパス
+        timeout: ロック取得のタイムアウト（秒）
+
+    Returns:
+        FileLock インスタンス
+    """
+    return FileLock(lock_path, timeout=timeout)
@@ -8,30 +8,292 @@ Stopフックから呼び出され、セッション全体のサブエージェ
 ログ出力先: .claude/logs/sessions/
 """
 import argparse
+import io
 import json
+import mmap
 import os
+import re
+import select
 import sys
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 # 共通設定をインポート
 from config import (
     INDEX_FILE,
     INDEX_LOCK_SUFFIX,
+    INDEX_OFFSETS_SUFFIX,
     LOG_BASE_DIR,
     SESSION_SUMMARY_DIR,
+    SUBAGENT_LOG_CACHE_SIZE,
     USER_PROMPTS_FILE,
-    FileLock,
+    get_file_lock,
     is_safe_path,
-    redact_sensitive_data,
+    redact_head,
     sanitize_branch_name,
 )
 
+if TYPE_CHECKING:
+    import ctypes
+
+# "## 最終結果" セクションの見出しと終端（次のセクションヘッダー または 行頭の---）
+# ログファイルをバイト列のまま検索するためバイト列パターンで持つ
+_FINAL_RESULT_MARKER = "## 最終結果".encode("utf-8")
+_SECTION_END_RE = re.compile(rb'\n(## |---\n)')
+
+# 最終結果の抽出キャッシュ: (パス, 更新時刻ns, サイズ) -> 最終結果
+_SUBAGENT_LOG_CACHE: OrderedDict[tuple[str, int, int], str | None] = OrderedDict()
+
 
 # =============================================================================
 # データ収集
 # =============================================================================
+def _iter_lines_containing(data: bytes | mmap.mmap, key: bytes):
+    """
+    バッファ全体を1回走査し、key を含む行のみを返す
+
+    行ごとに分割・照合する代わりに key の出現位置から行境界を求めるため、
+    対象外の行は分割もデコードもしない。
+
+    Args:
+        data: JSONL ファイルの内容（バイト列またはメモリマップ）
+        key: 検索するバイト列
+
+    Yields:
+        key を含む行（改行を含まない）
+    """
+    pos = 0
+    while True:
+        hit = data.find(key, pos)
+        if hit < 0:
+            return
+        line_start = data.rfind(b"\n", 0, hit) + 1
+        line_end = data.find(b"\n", hit)
+        if line_end < 0:
+            line_end = len(data)
+        yield data[line_start:line_end]
+        # 同じ行内の後続の一致は読み飛ばす
+        pos = line_end + 1
+
+
+def _read_lines_containing(path: str, key: bytes) -> list[bytes]:
+    """
+    ファイルをメモリマップし、key を含む行のみを取り出す
+
+    ファイル全体をコピー・デコードせず、対象行のみをバイト列として返す。
+
+    Args:
+        path: JSONL ファイルのパス
+        key: 検索するバイト列
+
+    Returns:
+        key を含む行のリスト
+    """
+    with open(path, "rb") as f:
+        # 空ファイルはメモリマップできない
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return list(_iter_lines_containing(mm, key))
+
+
+def _read_lines_via_offsets(index_path: str, session_key: bytes) -> list[bytes] | None:
+    """
+    オフセット索引（index.jsonl.idx）を使って対象セッションの行のみを読み込む
+
+    索引がインデックス全体を先頭から末尾まで隙間なく覆っている場合のみ使用する。
+    索引が無い・途中で途切れている・レコードが連続していない
+    （旧バージョンで書かれた行がある、索引の追記に失敗した等）場合は
+    None を返し、呼び出し側で全件走査にフォールバックさせる。
+    呼び出し側でインデックスのロックを保持していること。
+
+    Args:
+        index_path: index.jsonl のパス
+        session_key: JSON文字列形式でエンコードしたセッションID
+
+    Returns:
+        対象セッションの行のリスト（索引が使えない場合はNone）
+    """
+    try:
+        with open(index_path + INDEX_OFFSETS_SUFFIX, "rb") as f:
+            offsets_data = f.read()
+    except OSError:
+        return None
+
+    # 各レコードが直前のレコードの直後から始まっていることを確認しながら対象範囲を集める
+    ranges: list[tuple[int, int]] = []
+    covered_size = 0
+    try:
+        for record in offsets_data.splitlines():
+            key, offset, length = record.rsplit(b"\t", 2)
+            if int(offset) != covered_size:
+                return None
+            if key == session_key:
+                ranges.append((covered_size, int(length)))
+            covered_size += int(length)
+    except ValueError:
+        return None
+
+    lines: list[bytes] = []
+    with open(index_path, "rb") as f:
+        if covered_size == 0 or os.fstat(f.fileno()).st_size != covered_size:
+            return None
+        for offset, length in ranges:
+            f.seek(offset)
+            lines.append(f.read(length))
+    return lines
+
+
+# インデックス行の "session" の値（JSON文字列）
+_SESSION_VALUE_RE = re.compile(rb'"session":\s*("(?:[^"\\]|\\.)*")')
+
+
+def _rebuild_offsets(index_path: str, session_key: bytes) -> list[bytes]:
+    """
+    インデックス全体を走査して対象セッションの行を取り出し、オフセット索引を作り直す
+
+    索引が使えない場合（索引導入前のインデックス、索引の追記漏れ等）の
+    フォールバック。次回以降は索引から対象行のみを読み込めるようにする。
+    呼び出し側でインデックスのロックを保持していること。
+
+    Args:
+        index_path: index.jsonl のパス
+        session_key: JSON文字列形式でエンコードしたセッションID
+
+    Returns:
+        対象セッションの行のリスト
+    """
+    lines: list[bytes] = []
+    records: list[bytes] = []
+    with open(index_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return lines
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0
+            while start < size:
+                end = mm.find(b"\n", start)
+                end = size if end < 0 else end + 1
+                line = mm[start:end]
+                # 書き込み時と同じ形式（ensure_ascii=False）に揃えてキーにする
+                # （解析できない行も索引の連続性を保つため、どのセッションにも一致しないキーで記録）
+                key = b"null"
+                match = _SESSION_VALUE_RE.search(line)
+                if match:
+                    try:
+                        key = json.dumps(json.loads(match.group(1)), ensure_ascii=False).encode("utf-8")
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        pass
+                if key == session_key:
+                    lines.append(line.rstrip(b"\n"))
+                records.append(b"%s\t%d\t%d\n" % (key, start, end - start))
+                start = end
+
+    # 一時ファイルに書き出してから置き換える（書きかけの索引を読ませない）
+    offsets_path = index_path + INDEX_OFFSETS_SUFFIX
+    tmp_path = offsets_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(records))
+        os.replace(tmp_path, offsets_path)
+    except OSError as e:
+        print(f"[session-summary] Warning: Failed to rebuild index offsets: {e}", file=sys.stderr)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return lines
+
+
+# inotify イベントマスク（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+
+_libc: "ctypes.CDLL | None" = None  # ctypes は使う時だけインポートする
+
+
+def _wait_with_inotify(path: str, timeout: float) -> bool:
+    """
+    inotify で path の書き込みを待機（Linux）
+
+    Returns:
+        待機できた場合True（inotify が使えない場合False）
+    """
+    global _libc
+    try:
+        if _libc is None:
+            # inotify を使う時（Linux で待機する時）だけインポート
+            import ctypes
+
+            _libc = ctypes.CDLL(None, use_errno=True)
+        fd = _libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    except (OSError, AttributeError):
+        return False
+    if fd < 0:
+        return False
+    try:
+        wd = _libc.inotify_add_watch(fd, os.fsencode(path), _IN_MODIFY | _IN_CLOSE_WRITE)
+        if wd < 0:
+            return False
+        select.select([fd], [], [], timeout)
+        return True
+    finally:
+        os.close(fd)
+
+
+def _wait_with_kqueue(path: str, timeout: float) -> bool:
+    """
+    kqueue で path の書き込みを待機（macOS / BSD）
+
+    Returns:
+        待機できた場合True（kqueue が使えない場合False）
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        kq = select.kqueue()
+        try:
+            event = select.kevent(
+                fd,
+                filter=select.KQ_FILTER_VNODE,
+                flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND,
+            )
+            kq.control([event], 1, timeout)
+        finally:
+            kq.close()
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def _wait_for_file_change(path: str, timeout: float) -> None:
+    """
+    path が書き込まれるか timeout 秒経過するまで待機
+
+    Linux では inotify、macOS / BSD では kqueue を使い、書き込みがあれば即座に戻る。
+    それ以外の環境（Windows 等）やファイルが未作成の場合は timeout 秒スリープする。
+
+    Args:
+        path: 監視するファイルのパス
+        timeout: 最大待機時間（秒）
+    """
+    if sys.platform.startswith("linux"):
+        if _wait_with_inotify(path, timeout):
+            return
+    elif hasattr(select, "kqueue"):
+        if _wait_with_kqueue(path, timeout):
+            return
+    time.sleep(timeout)
+
+
 def load_session_entries(
     project_root: str,
     session_id: str,
@@ -42,7 +304,10 @@ def load_session_entries(
     index.jsonlから指定セッションのエントリを読み込み（再試行・ロック付き）
 
     SubagentStopの非同期書き込みが完了するのを待つため、再試行ロジックを含む。
+    再試行間の待機はインデックスへの書き込みがあった時点で打ち切る。
     書き込みと同じFileLockを使用して部分読み取りを防止。
+    ロック中はファイル内容のスナップショット取得のみ行い、解析はロック解放後に行う。
+    オフセット索引が使える場合は対象セッションの行のみを読み込む。
 
     Args:
         project_root: プロジェクトルート
@@ -53,55 +318,73 @@ def load_session_entries(
     Returns:
         セッションに属するエントリのリスト
     """
-    import time
-
     index_path = os.path.join(project_root, INDEX_FILE)
     lock_path = index_path + INDEX_LOCK_SUFFIX
     entries: list[dict[str, Any]] = []
     last_count = -1
+    # index.jsonl に書き込まれる形式（JSON文字列）のままセッションIDを照合
+    session_key = json.dumps(session_id, ensure_ascii=False).encode("utf-8")
+
+    # 再試行の合計待機時間は従来どおり max_retries * retry_delay 秒
+    # （他セッションの書き込みで待機が早く打ち切られても再試行回数を消費しない）
+    deadline = time.monotonic() + max_retries * retry_delay
+    count_since = 0.0  # 現在のエントリ数を最初に観測した時刻（monotonic）
+    attempt = 0
 
-    for attempt in range(max_retries + 1):
+    while True:
+        attempt += 1
         entries = []
+        remaining = deadline - time.monotonic()
 
         if not os.path.exists(index_path):
-            if attempt < max_retries:
-                time.sleep(retry_delay)
+            if remaining > 0:
+                _wait_for_file_change(index_path, min(retry_delay, remaining))
                 continue
             return entries
 
         try:
             # 書き込みと同じFileLockを使用（部分読み取り防止）
-            with FileLock(lock_path, timeout=5.0):
-                with open(index_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            entry = json.loads(line)
-                            if entry.get("session") == session_id:
-                                entries.append(entry)
-                        except json.JSONDecodeError:
-                            continue
+            with get_file_lock(lock_path, timeout=5.0):
+                lines = _read_lines_via_offsets(index_path, session_key)
+                if lines is None:
+                    # 全件走査し、次回以降のために索引を作り直す
+                    lines = _rebuild_offsets(index_path, session_key)
         except TimeoutError:
-            print(f"[session-summary] Warning: Lock timeout (attempt {attempt + 1})", file=sys.stderr)
-            if attempt < max_retries:
-                time.sleep(retry_delay)
+            print(f"[session-summary] Warning: Lock timeout (attempt {attempt})", file=sys.stderr)
+            if remaining > 0:
+                time.sleep(min(retry_delay, remaining))
                 continue
         except OSError as e:
-            print(f"[session-summary] Warning: Failed to read index (attempt {attempt + 1}): {e}", file=sys.stderr)
-            if attempt < max_retries:
-                time.sleep(retry_delay)
+            print(f"[session-summary] Warning: Failed to read index (attempt {attempt}): {e}", file=sys.stderr)
+            if remaining > 0:
+                time.sleep(min(retry_delay, remaining))
                 continue
+        else:
+            # ロック解放後に解析（対象セッションを含まない行は JSON デコードを省略）
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                    if entry.get("session") == session_id:
+                        entries.append(entry)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
 
-        # エントリ数が増えなくなったら安定したとみなす
-        if len(entries) == last_count and len(entries) > 0:
+        # エントリ数が retry_delay 秒以上増えなくなったら安定したとみなす
+        # （書き込みによる早期の再読み込みだけでは安定と判定しない）
+        now = time.monotonic()
+        if len(entries) != last_count:
+            last_count = len(entries)
+            count_since = now
+        elif len(entries) > 0 and now - count_since >= retry_delay:
             break
-        last_count = len(entries)
 
-        # まだ再試行できる場合は待機
-        if attempt < max_retries:
-            time.sleep(retry_delay)
+        # まだ再試行できる場合は待機（書き込みがあれば即座に再読み込み）
+        remaining = deadline - now
+        if remaining <= 0:
+            break
+        # エントリがある場合は、現在の件数が retry_delay 秒続く時点まで待つ
+        wait = retry_delay - (now - count_since) if entries else retry_delay
+        _wait_for_file_change(index_path, min(wait, remaining))
 
     return entries
 
@@ -123,28 +406,70 @@ def load_user_prompts(project_root: str, session_id: str) -> list[dict[str, Any]
     if not os.path.exists(prompts_path):
         return prompts
 
+    # user_prompts.jsonl に書き込まれる形式（JSON文字列）のままセッションIDを照合
+    session_key = json.dumps(session_id, ensure_ascii=False).encode("utf-8")
+
     try:
-        with open(prompts_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                    if entry.get("session_id") == session_id:
-                        prompts.append(entry)
-                except json.JSONDecodeError:
-                    continue
-    except OSError as e:
+        for line in _read_lines_containing(prompts_path, session_key):
+            try:
+                entry = json.loads(line)
+                if entry.get("session_id") == session_id:
+                    prompts.append(entry)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+    except (OSError, ValueError) as e:
         print(f"[session-summary] Warning: Failed to read prompts: {e}", file=sys.stderr)
 
     return prompts
 
 
+def _extract_final_result(log_path: str) -> str | None:
+    """
+    ログファイルから "## 最終結果" セクションを抽出（機密情報マスキング・500文字制限付き）
+
+    ファイルをメモリマップし、最初の "## 最終結果" とその終端をバイト列のまま検索して
+    セクション部分のみをデコードする（ファイル全体の読み込み・デコードを行わない）。
+
+    Args:
+        log_path: ログファイルのパス
+
+    Returns:
+        最終結果のテキスト（見つからない場合はNone）
+
+    Raises:
+        OSError: ファイルの読み込みに失敗した場合
+    """
+    with open(log_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        # ファイル全体を読み込み・デコードせず、マッピング上で区切りを探す
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # "## 最終結果" セクションを抽出（ファイル内で最初に現れるもの）
+            idx = mm.find(_FINAL_RESULT_MARKER)
+            if idx < 0:
+                return None
+            start = idx + len(_FINAL_RESULT_MARKER)
+            # 次のセクションヘッダー（## または行頭の---）までを取得
+            # 行頭の---のみをセクション区切りとして扱う
+            match = _SECTION_END_RE.search(mm, start)
+            end = match.start() if match else len(mm)
+            result_section = mm[start:end].decode("utf-8", "replace")
+
+    # 機密情報をマスキング（表示されない部分は transcript-analyzer と同じ方法で先に切り捨てる）
+    result, truncated = redact_head(result_section.strip(), 500)
+    # 最大500文字に制限
+    if truncated:
+        result = result[:497] + "..."
+    return result
+
+
 def read_subagent_log(project_root: str, log_file: str) -> str | None:
     """
     サブエージェントログファイルの最終結果を抽出
 
+    結果は (パス, 更新時刻, サイズ) をキーにキャッシュし、
+    ファイルが変更されていなければ再読み込みしない。
+
     Args:
         project_root: プロジェクトルート
         log_file: ログファイルの相対パス
@@ -152,42 +477,31 @@ def read_subagent_log(project_root: str, log_file: str) -> str | None:
     Returns:
         最終結果のテキスト（見つからない場合はNone）
     """
-    import re
-
     log_path = os.path.join(project_root, LOG_BASE_DIR, log_file)
 
     # パス検証
     if not is_safe_path(log_path, [project_root]):
         return None
 
-    if not os.path.exists(log_path):
+    try:
+        st = os.stat(log_path)
+    except OSError:
         return None
 
+    cache_key = (log_path, st.st_mtime_ns, st.st_size)
+    if cache_key in _SUBAGENT_LOG_CACHE:
+        _SUBAGENT_LOG_CACHE.move_to_end(cache_key)
+        return _SUBAGENT_LOG_CACHE[cache_key]
+
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # "## 最終結果" セクションを抽出
-        if "## 最終結果" in content:
-            parts = content.split("## 最終結果", 1)
-            if len(parts) > 1:
-                result_section = parts[1]
-                # 次のセクションヘッダー（## または行頭の---）までを取得
-                # 行頭の---のみをセクション区切りとして扱う
-                match = re.search(r'\n(## |---\n)', result_section)
-                if match:
-                    result_section = result_section[:match.start()]
-                result = result_section.strip()
-                # 機密情報をマスキング
-                result = redact_sensitive_data(result)
-                # 最大500文字に制限
-                if len(result) > 500:
-                    result = result[:497] + "..."
-                return result
+        result = _extract_final_result(log_path)
     except OSError:
-        pass
+        return None
 
-    return None
+    _SUBAGENT_LOG_CACHE[cache_key] = result
+    if len(_SUBAGENT_LOG_CACHE) > SUBAGENT_LOG_CACHE_SIZE:
+        _SUBAGENT_LOG_CACHE.popitem(last=False)
+    return result
 
 
 # =============================================================================
@@ -215,79 +529,91 @@ def generate_session_summary(
     Returns:
         Markdown形式のサマリー文字列
     """
-    lines: list[str] = []
+    buf = io.StringIO()
+    w = buf.write
+
+    # エントリを1回だけ走査して列ごとのリストに展開
+    starts: list[str] = []
+    durations: list[int] = []
+    subagents: list[str] = []
+    log_files: list[str] = []
+    branches: set[str] = set()
+    for e in entries:
+        starts.append(e.get("start", ""))
+        durations.append(e.get("duration_ms") or 0)
+        subagents.append(e.get("subagent", "unknown"))
+        log_files.append(e.get("log_file", ""))
+        branches.add(e.get("branch", "unknown"))
 
     # ヘッダー
     date_str = datetime.now().strftime("%Y-%m-%d")
-    lines.append(f"# Session Summary: {date_str}")
-    lines.append("")
+    w(f"# Session Summary: {date_str}\n")
+    w("\n")
 
     # 概要テーブル
-    lines.append("## 概要")
-    lines.append("")
-    lines.append("| 項目 | 値 |")
-    lines.append("|------|-----|")
-    lines.append(f"| セッションID | `{session_id[:16]}...` |")
-    lines.append(f"| 開始時刻 | {start_ts} |")
-    lines.append(f"| 終了時刻 | {end_ts} |")
-    lines.append(f"| サブエージェント呼び出し回数 | {len(entries)} |")
-    lines.append(f"| ユーザープロンプト数 | {len(prompts)} |")
+    w("## 概要\n")
+    w("\n")
+    w("| 項目 | 値 |\n")
+    w("|------|-----|\n")
+    w(f"| セッションID | `{session_id[:16]}...` |\n")
+    w(f"| 開始時刻 | {start_ts} |\n")
+    w(f"| 終了時刻 | {end_ts} |\n")
+    w(f"| サブエージェント呼び出し回数 | {len(entries)} |\n")
+    w(f"| ユーザープロンプト数 | {len(prompts)} |\n")
 
     # 合計実行時間
-    total_duration_ms = sum(e.get("duration_ms", 0) or 0 for e in entries)
+    total_duration_ms = sum(durations)
     if total_duration_ms > 0:
         total_duration_sec = total_duration_ms / 1000
-        lines.append(f"| サブエージェント合計実行時間 | {total_duration_sec:.1f}秒 |")
+        w(f"| サブエージェント合計実行時間 | {total_duration_sec:.1f}秒 |\n")
 
     # ブランチ情報
-    branches = set(e.get("branch", "unknown") for e in entries)
     if branches:
-        lines.append(f"| ブランチ | {', '.join(branches)} |")
+        w(f"| ブランチ | {', '.join(branches)} |\n")
 
-    lines.append("")
-    lines.append("---")
-    lines.append("")
+    w("\n")
+    w("---\n")
+    w("\n")
 
     # ユーザープロンプト履歴
     if prompts:
-        lines.append("## ユーザープロンプト履歴")
-        lines.append("")
+        w("## ユーザープロンプト履歴\n")
+        w("\n")
         for i, prompt in enumerate(prompts, 1):
             timestamp = prompt.get("timestamp", "")
             time_str = timestamp.split("T")[1][:8] if "T" in timestamp else timestamp
             prompt_text = prompt.get("prompt", "")[:200]
-            lines.append(f"### {i}. [{time_str}]")
-            lines.append("")
-            lines.append(f"> {prompt_text}")
+            w(f"### {i}. [{time_str}]\n")
+            w("\n")
+            w(f"> {prompt_text}\n")
             if len(prompt.get("prompt", "")) > 200:
-                lines.append("> ...")
-            lines.append("")
-        lines.append("---")
-        lines.append("")
+                w("> ...\n")
+            w("\n")
+        w("---\n")
+        w("\n")
 
     # サブエージェント呼び出し履歴
     if entries:
-        lines.append("## サブエージェント呼び出し履歴")
-        lines.append("")
+        w("## サブエージェント呼び出し履歴\n")
+        w("\n")
 
-        # 時刻順にソート
-        sorted_entries = sorted(entries, key=lambda x: x.get("start", ""))
+        # 時刻順にソート（インデックスのみ並べ替え）
+        order = sorted(range(len(entries)), key=starts.__getitem__)
 
-        for i, entry in enumerate(sorted_entries, 1):
-            subagent = entry.get("subagent", "unknown")
-            start = entry.get("start", "")
+        for i, idx in enumerate(order, 1):
+            start = starts[idx]
             time_str = start.split("T")[1][:8] if "T" in start else start
-            duration_ms = entry.get("duration_ms")
+            duration_ms = durations[idx]
             duration_str = f" ({duration_ms / 1000:.1f}秒)" if duration_ms else ""
-            log_file = entry.get("log_file", "")
+            log_file = log_files[idx]
 
-            lines.append(f"### {i}. {subagent} [{time_str}]{duration_str}")
-            lines.append("")
+            w(f"### {i}. {subagents[idx]} [{time_str}]{duration_str}\n")
+            w("\n")
 
             # ログファイルへのリンク
             if log_file:
-                lines.append(f"**ログ**: `{LOG_BASE_DIR}/{log_file}`")
-                lines.append("")
+                w(f"**ログ**: `{LOG_BASE_DIR}/{log_file}`\n")
+                w("\n")
 
                 # 最終結果を抽出
                 result = read_subagent_log(project_root, log_file)
@@ -295,22 +621,21 @@ def generate_session_summary(
                     # 結果を引用形式で表示
                     result_lines = result.split("\n")
                     for line in result_lines[:5]:  # 最大5行
-                        lines.append(f"> {line}")
+                        w(f"> {line}\n")
                     if len(result_lines) > 5:
-                        lines.append("> ...")
-                    lines.append("")
+                        w("> ...\n")
+                    w("\n")
     else:
-        lines.append("## サブエージェント呼び出し履歴")
-        lines.append("")
-        lines.append("(サブエージェント呼び出しなし)")
-        lines.append("")
+        w("## サブエージェント呼び出し履歴\n")
+        w("\n")
+        w("(サブエージェント呼び出しなし)\n")
+        w("\n")
 
-    lines.append("---")
-    lines.append("")
-    lines.append(f"*Generated at {datetime.now().isoformat()}*")
-    lines.append("")
+    w("---\n")
+    w("\n")
+    w(f"*Generated at {datetime.now().isoformat()}*\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # =============================================================================
@@ -387,23 +712,22 @@ def main() -> int:
     try:
         if args.input_file:
             input_file_path = args.input_file
-            with open(input_file_path, "r", encoding="utf-8") as f:
-                input_data = json.load(f)
+            # バイト列のまま json.loads に渡す（テキスト層を経由しない）
+            with open(input_file_path, "rb") as f:
+                input_data = json.loads(f.read())
         else:
-            # Windows環境でのエンコーディング問題対策
-            if sys.platform == "win32":
-                import io
-                sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
-            input_data = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
+            # バイト列で読むため Windows のコンソールエンコーディングの影響を受けない
+            input_data = json.loads(sys.stdin.buffer.read())
+    except ValueError as e:
+        # JSONDecodeError / UnicodeDecodeError
         print(f"[session-summary] Error: Invalid JSON input: {e}", file=sys.stderr)
         return 1
     except OSError as e:
         print(f"[session-summary] Error reading input file: {e}", file=sys.stderr)
         return 1
     finally:
-        # 一時ファイルを削除
-        if input_file_path and os.path.exists(input_file_path):
+        # 一時ファイルを削除（存在確認はせず、無ければ無視）
+        if input_file_path:
             try:
                 os.remove(input_file_path)
             except OSError:
@@ -14,33 +14,62 @@ Note:
 
 ログ出力先: .claude/logs/agents/
 """
+import functools
 import json
+import mmap
 import os
-import subprocess
 import sys
-import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 # 共通設定をインポート
 from config import (
+    ATOMIC_APPEND_MAX_BYTES,
     MAX_PARENT_TRANSCRIPT_EVENTS,
     MAX_PARENT_TRANSCRIPT_MB,
     MAX_PROMPT_LENGTH,
+    SESSION_CACHE_COMPACT_BYTES,
     SESSION_CACHE_FILE,
     SESSION_CACHE_LOCK,
     USER_PROMPTS_FILE,
-    FileLock,
     cleanup_old_cache_entries,
+    get_file_lock,
     get_project_root,
     is_safe_path,
 )
 
+# ホームディレクトリ（transcript パス検証の許可ディレクトリ）
+_HOME = os.path.expanduser("~")
+
 
 # =============================================================================
 # セッションキャッシュ操作（ファイルロック付き）
 # =============================================================================
+def _read_session_cache_lines() -> dict[str, Any]:
+    """
+    セッションキャッシュ（JSONL）を読み込み、キーごとに最後の値を採用して辞書化
+
+    呼び出し側でキャッシュのロックを保持していること。
+
+    Returns:
+        セッションキャッシュの辞書
+    """
+    cache: dict[str, Any] = {}
+    try:
+        with open(SESSION_CACHE_FILE, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    cache[record["key"]] = record["value"]
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    # 書き込み途中の行や不正な行は無視
+                    continue
+    except FileNotFoundError:
+        pass
+    return cache
+
+
 def load_session_cache() -> dict[str, Any]:
     """
     セッションキャッシュを読み込み（ファイルロック付き）
@@ -48,16 +77,20 @@ def load_session_cache() -> dict[str, Any]:
     Returns:
         セッションキャッシュの辞書
     """
+    # キャッシュが無い・空の場合はロックを取らずに返す
     try:
-        with FileLock(SESSION_CACHE_LOCK, timeout=5.0):
-            if SESSION_CACHE_FILE.exists():
-                content = SESSION_CACHE_FILE.read_text(encoding="utf-8")
-                if content.strip():
-                    return json.loads(content)
+        if os.stat(SESSION_CACHE_FILE).st_size == 0:
+            return {}
+    except FileNotFoundError:
+        return {}
+    except OSError:
+        pass
+
+    try:
+        with get_file_lock(SESSION_CACHE_LOCK, timeout=5.0):
+            return _read_session_cache_lines()
     except TimeoutError:
         print("[task-logger] Warning: Failed to acquire cache lock (timeout)", file=sys.stderr)
-    except json.JSONDecodeError as e:
-        print(f"[task-logger] Warning: Invalid cache JSON: {e}", file=sys.stderr)
     except Exception as e:
         print(f"[task-logger] Warning: Failed to load session cache: {e}", file=sys.stderr)
     return {}
@@ -65,28 +98,193 @@ def load_session_cache() -> dict[str, Any]:
 
 def save_session_cache(cache: dict[str, Any]) -> None:
     """
-    セッションキャッシュを保存（ファイルロック付き）
+    セッションキャッシュにエントリを追記（ファイルロック付き）
+
+    キャッシュ全体を書き直さず、渡されたエントリのみを1行ずつ追記する。
+    同じキーが複数回書かれた場合は読み込み時に最後の値が採用される。
 
     Args:
-        cache: 保存するキャッシュ辞書
+        cache: 追記するエントリの辞書（キャッシュキー -> エントリ）
     """
+    data = "".join(
+        json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+        for key, value in cache.items()
+    )
     try:
-        with FileLock(SESSION_CACHE_LOCK, timeout=5.0):
+        with get_file_lock(SESSION_CACHE_LOCK, timeout=5.0):
             SESSION_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-            SESSION_CACHE_FILE.write_text(
-                json.dumps(cache, ensure_ascii=False, indent=2),
-                encoding="utf-8"
-            )
+            with open(SESSION_CACHE_FILE, "a", encoding="utf-8") as f:
+                f.write(data)
     except TimeoutError:
         print("[task-logger] Warning: Failed to acquire cache lock for save (timeout)", file=sys.stderr)
     except Exception as e:
         print(f"[task-logger] Warning: Failed to save session cache: {e}", file=sys.stderr)
 
 
+def compact_session_cache_if_needed() -> None:
+    """
+    セッションキャッシュが SESSION_CACHE_COMPACT_BYTES を超えた場合のみ圧縮
+
+    重複キーを統合し古いエントリを削除した内容を一時ファイルに書き出し、
+    os.replace でアトミックに置き換える。
+    """
+    try:
+        if os.path.getsize(SESSION_CACHE_FILE) <= SESSION_CACHE_COMPACT_BYTES:
+            return
+    except OSError:
+        return
+
+    try:
+        with get_file_lock(SESSION_CACHE_LOCK, timeout=5.0):
+            # ロック待ちの間に他のプロセスが圧縮済みの場合はスキップ
+            if os.path.getsize(SESSION_CACHE_FILE) <= SESSION_CACHE_COMPACT_BYTES:
+                return
+            cache = cleanup_old_cache_entries(_read_session_cache_lines())
+            tmp_path = SESSION_CACHE_FILE.with_name(SESSION_CACHE_FILE.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for key, value in cache.items():
+                    f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, SESSION_CACHE_FILE)
+    except TimeoutError:
+        print("[task-logger] Warning: Failed to acquire cache lock for compaction (timeout)", file=sys.stderr)
+    except Exception as e:
+        print(f"[task-logger] Warning: Failed to compact session cache: {e}", file=sys.stderr)
+
+
+# =============================================================================
+# バックグラウンド処理の起動
+# =============================================================================
+@functools.lru_cache(maxsize=4)
+def find_hook_script(project_root: Path, name: str) -> Path | None:
+    """
+    フックディレクトリ内のスクリプトのパスを解決（結果をキャッシュ）
+
+    パスの組み立てと存在確認（stat）はスクリプトごとに初回のみ行う。
+
+    Args:
+        project_root: プロジェクトルート
+        name: スクリプトのファイル名
+
+    Returns:
+        スクリプトのパス（存在しない場合はNone）
+    """
+    script = project_root / ".claude" / "hooks" / "task-logging" / name
+    return script if script.exists() else None
+
+
+def _inheritable_fds() -> list[int]:
+    """
+    子プロセスに継承される fd 3 以降のファイルディスクリプタを列挙
+
+    Python が開く fd は既定で継承されない（close-on-exec）ため、
+    対象は親プロセスから引き継いだ fd や明示的に継承可能にした fd のみ。
+
+    Returns:
+        継承される fd のリスト
+
+    Raises:
+        OSError: fd の一覧を取得できない場合
+    """
+    fd_dir = "/proc/self/fd" if os.path.isdir("/proc/self/fd") else "/dev/fd"
+    fds = []
+    for name in os.listdir(fd_dir):
+        fd = int(name)
+        if fd < 3:
+            continue
+        try:
+            if os.get_inheritable(fd):
+                fds.append(fd)
+        except OSError:
+            # 一覧の取得に使った fd（既に閉じている）
+            continue
+    return fds
+
+
+def spawn_background_script(script: Path, payload: dict[str, Any]) -> None:
+    """
+    スクリプトを親から切り離してバックグラウンドで起動
+
+    入力データは一時ファイル経由で --input-file として渡す
+    （一時ファイルは起動されたスクリプト側で削除する）。
+
+    プラットフォーム動作の違い:
+        - Windows: CREATE_NEW_PROCESS_GROUP | DETACHED_PROCESS で Popen
+        - Unix: os.posix_spawn で新しいセッションとして起動
+          （fork による親プロセスのアドレス空間複製を避ける）。
+          標準入出力以外の継承可能な fd は Popen(close_fds=True) と同様に閉じる。
+          使えない環境では Popen(start_new_session=True) で起動
+
+    Args:
+        script: 起動するスクリプトのパス
+        payload: スクリプトに渡す入力データ
+
+    Raises:
+        OSError: 一時ファイルの作成またはプロセス起動に失敗した場合
+    """
+    # PreToolUse / UserPromptSubmit では不要なため、使う時だけインポート
+    import tempfile
+
+    # 1回のエンコード・1回の書き込みで一時ファイルへ渡す
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp_file:
+        tmp_file.write(data)
+        tmp_path = tmp_file.name
+
+    args = [sys.executable, str(script), "--input-file", tmp_path]
+    try:
+        if sys.platform == "win32":
+            import subprocess
+
+            # CREATE_NEW_PROCESS_GROUP で親から切り離し
+            subprocess.Popen(
+                args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
+            )
+        else:
+            # nohup 相当: 標準入出力を /dev/null に向け、新しいセッションで起動
+            # （親から引き継いだそれ以外の fd はバックグラウンドプロセスに渡さない）
+            try:
+                file_actions = [
+                    (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                    (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+                    (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+                ]
+                file_actions.extend((os.POSIX_SPAWN_CLOSE, fd) for fd in _inheritable_fds())
+                os.posix_spawn(
+                    sys.executable,
+                    args,
+                    os.environ,
+                    file_actions=file_actions,
+                    setsid=True,
+                )
+            except (AttributeError, NotImplementedError, OSError):
+                # posix_spawn / POSIX_SPAWN_SETSID が使えない環境
+                # （glibc 2.26 未満や一部の BSD など）では subprocess で起動
+                import subprocess
+
+                subprocess.Popen(
+                    args,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+    except BaseException:
+        # 起動できなかった場合は一時ファイルを削除
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 # =============================================================================
 # イベントハンドラ
 # =============================================================================
-def handle_pre_tool_use(hook_input: dict[str, Any]) -> int:
+def handle_pre_tool_use(hook_input: dict[str, Any], now: datetime) -> int:
     """
     PreToolUse イベント処理（Task 開始）
 
@@ -94,6 +292,7 @@ def handle_pre_tool_use(hook_input: dict[str, Any]) -> int:
 
     Args:
         hook_input: フックからの入力データ
+        now: イベント受信時刻
 
     Returns:
         終了コード（0: 成功）
@@ -106,30 +305,33 @@ def handle_pre_tool_use(hook_input: dict[str, Any]) -> int:
     subagent_type = tool_input.get("subagent_type", "unknown")
     session_id = hook_input.get("session_id", "unknown")
     tool_use_id = hook_input.get("tool_use_id", "")
-    now = datetime.now()
     date_str = now.strftime("%Y-%m-%d")
 
-    # セッションキャッシュを読み込み、古いエントリをクリーンアップ
-    cache = load_session_cache()
-    cache = cleanup_old_cache_entries(cache)
-
-    # 新規エントリを追加
+    # 新規エントリを追記（キャッシュ全体は読み込まない）
     cache_key = f"{session_id}_{tool_use_id}"
-    cache[cache_key] = {
-        "start_ts": now.isoformat(),
-        "subagent": subagent_type,
-        "date": date_str,
-        "description": tool_input.get("description", ""),
-        "prompt": tool_input.get("prompt", "")[:MAX_PROMPT_LENGTH],
-        "model": tool_input.get("model"),
-        "cwd": hook_input.get("cwd", "")
-    }
-    save_session_cache(cache)
+    save_session_cache({
+        cache_key: {
+            "start_ts": now.isoformat(),
+            "subagent": subagent_type,
+            "date": date_str,
+            "description": tool_input.get("description", ""),
+            "prompt": tool_input.get("prompt", "")[:MAX_PROMPT_LENGTH],
+            "model": tool_input.get("model"),
+            "cwd": hook_input.get("cwd", "")
+        }
+    })
+
+    # 肥大化した場合のみ重複と古いエントリを削除
+    compact_session_cache_if_needed()
 
     return 0
 
 
-def handle_user_prompt_submit(hook_input: dict[str, Any]) -> int:
+def handle_user_prompt_submit(
+    hook_input: dict[str, Any],
+    project_root: Path,
+    now: datetime
+) -> int:
     """
     UserPromptSubmit イベント処理（ユーザープロンプト記録）
 
@@ -137,13 +339,14 @@ def handle_user_prompt_submit(hook_input: dict[str, Any]) -> int:
 
     Args:
         hook_input: フックからの入力データ
+        project_root: プロジェクトルート
+        now: イベント受信時刻
 
     Returns:
         終了コード（0: 成功）
     """
     session_id = hook_input.get("session_id", "unknown")
     prompt = hook_input.get("prompt", "")
-    now = datetime.now()
 
     if not prompt:
         return 0
@@ -156,16 +359,25 @@ def handle_user_prompt_submit(hook_input: dict[str, Any]) -> int:
         "date": now.strftime("%Y-%m-%d")
     }
 
-    # ファイルに追記（ロック付き）
-    project_root = get_project_root()
+    # ファイルに追記
     prompts_file = project_root / USER_PROMPTS_FILE
     lock_file = str(prompts_file) + ".lock"
+    data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
 
     try:
         prompts_file.parent.mkdir(parents=True, exist_ok=True)
-        with FileLock(lock_file, timeout=5.0):
-            with open(prompts_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if sys.platform != "win32" and len(data) <= ATOMIC_APPEND_MAX_BYTES:
+            # Unix: O_APPEND の単一 write は並行追記でも行が混ざらないためロック不要
+            fd = os.open(prompts_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        else:
+            # Windows / 長いプロンプト: ロック付きで追記
+            with get_file_lock(lock_file, timeout=5.0):
+                with open(prompts_file, "ab") as f:
+                    f.write(data)
     except TimeoutError:
         print(f"[task-logger] Warning: Lock timeout for user prompts", file=sys.stderr)
     except Exception as e:
@@ -196,7 +408,7 @@ def extract_task_info_from_transcript(
     """
     # パス検証: ホームディレクトリまたはプロジェクトルート内のみ許可
     expanded_path = os.path.expanduser(transcript_path)
-    allowed_prefixes = [os.path.expanduser("~"), str(project_root)]
+    allowed_prefixes = (_HOME, str(project_root))
     if not is_safe_path(expanded_path, allowed_prefixes):
         print(f"[task-logger] Warning: Transcript path outside allowed directories", file=sys.stderr)
         return None, ""
@@ -211,59 +423,81 @@ def extract_task_info_from_transcript(
     except OSError:
         pass  # ファイルサイズ取得失敗は無視して続行
 
-    task_infos: list[tuple[dict[str, Any], str]] = []  # (task_info, tool_use_id)
+    # 一致しない場合のフォールバック用に最新のTask情報のみ保持
+    latest_task_info: tuple[dict[str, Any], str] | None = None  # (task_info, tool_use_id)
     event_count = 0
     try:
-        with open(expanded_path, "r", encoding="utf-8") as f:
-            for line in f:
-                # イベント数上限チェック（パフォーマンス対策）
-                event_count += 1
-                if event_count > MAX_PARENT_TRANSCRIPT_EVENTS:
-                    print(f"[task-logger] Warning: Parent transcript too many events (>{MAX_PARENT_TRANSCRIPT_EVENTS}), stopping scan", file=sys.stderr)
-                    break
-
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                    # assistantメッセージ内のtool_useを探す
-                    if event.get("type") == "assistant":
-                        message = event.get("message", {})
-                        content_list = message.get("content", [])
-                        for content in content_list:
-                            if isinstance(content, dict) and content.get("type") == "tool_use":
-                                if content.get("name") == "Task":
-                                    tool_use_id = content.get("id", "")
-                                    tool_input = content.get("input", {})
-                                    if "subagent_type" in tool_input:
-                                        task_info = {
-                                            "subagent": tool_input.get("subagent_type", "unknown"),
-                                            "description": tool_input.get("description", ""),
-                                            "prompt": tool_input.get("prompt", "")[:MAX_PROMPT_LENGTH],
-                                            "model": tool_input.get("model"),
-                                        }
-                                        task_infos.append((task_info, tool_use_id))
-                except json.JSONDecodeError:
-                    continue
+        with open(expanded_path, "rb") as f:
+            # 空ファイルはメモリマップできない
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # 改行位置を find（memchr）で求め、Task 呼び出しを含む行のみ切り出す
+                # ループ内で参照するグローバル・属性はローカル変数に束縛
+                max_events = MAX_PARENT_TRANSCRIPT_EVENTS
+                find = mm.find
+                loads = json.loads
+                size = len(mm)
+                pos = 0
+                while pos < size:
+                    # イベント数上限チェック（パフォーマンス対策）
+                    event_count += 1
+                    if event_count > max_events:
+                        print(f"[task-logger] Warning: Parent transcript too many events (>{MAX_PARENT_TRANSCRIPT_EVENTS}), stopping scan", file=sys.stderr)
+                        break
+
+                    line_start = pos
+                    line_end = find(b"\n", pos)
+                    if line_end < 0:
+                        line_end = size
+                    pos = line_end + 1
+
+                    # Task 呼び出しを含まない行（空行を含む）はコピーも JSON デコードも省略
+                    # json.loads は前後の空白を許容するため strip は不要
+                    if find(b'"Task"', line_start, line_end) < 0:
+                        continue
+                    line = mm[line_start:line_end]
+                    try:
+                        event = loads(line)
+                        # assistantメッセージ内のtool_useを探す
+                        if event.get("type") == "assistant":
+                            message = event.get("message", {})
+                            content_list = message.get("content", [])
+                            for content in content_list:
+                                if isinstance(content, dict) and content.get("type") == "tool_use":
+                                    if content.get("name") == "Task":
+                                        tool_use_id = content.get("id", "")
+                                        tool_input = content.get("input", {})
+                                        if "subagent_type" in tool_input:
+                                            task_info = {
+                                                "subagent": tool_input.get("subagent_type", "unknown"),
+                                                "description": tool_input.get("description", ""),
+                                                "prompt": tool_input.get("prompt", "")[:MAX_PROMPT_LENGTH],
+                                                "model": tool_input.get("model"),
+                                            }
+                                            # agent_id と一致する tool_use_id が見つかれば即座に返す
+                                            if agent_id and tool_use_id and tool_use_id in agent_id:
+                                                return task_info, tool_use_id
+                                            latest_task_info = (task_info, tool_use_id)
+                    except ValueError:
+                        continue
     except Exception as e:
         print(f"[task-logger] Warning: Failed to read transcript: {e}", file=sys.stderr)
         return None, ""
 
-    # agent_id と一致する tool_use_id を探す（優先）
-    for task_info, tool_use_id in task_infos:
-        if tool_use_id and agent_id and tool_use_id in agent_id:
-            return task_info, tool_use_id
-
     # 一致しない場合は最新のTask情報を返す（フォールバック）
-    if task_infos:
+    if latest_task_info:
         print(f"[task-logger] Warning: No matching tool_use_id found for agent_id={agent_id}, using latest Task", file=sys.stderr)
-        return task_infos[-1]
+        return latest_task_info
 
     return None, ""
 
 
-def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
+def handle_subagent_stop(
+    hook_input: dict[str, Any],
+    project_root: Path,
+    now: datetime
+) -> int:
     """
     SubagentStop イベント処理（Task 終了）
 
@@ -271,6 +505,8 @@ def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
 
     Args:
         hook_input: フックからの入力データ
+        project_root: プロジェクトルート
+        now: イベント受信時刻
 
     Returns:
         終了コード（0: 成功, 1: エラー）
@@ -283,9 +519,6 @@ def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
     if not transcript_path or not agent_transcript_path:
         return 0
 
-    now = datetime.now()
-    project_root = get_project_root()
-
     # 親transcriptからTask情報を取得（PreToolUseの代替）
     session_info, tool_use_id = extract_task_info_from_transcript(
         transcript_path, agent_id, project_root
@@ -308,10 +541,10 @@ def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
     session_info["cwd"] = hook_input.get("cwd", "")
 
     # バックグラウンドで transcript-analyzer.py を起動
-    analyzer_script = project_root / ".claude" / "hooks" / "task-logging" / "transcript-analyzer.py"
+    analyzer_script = find_hook_script(project_root, "transcript-analyzer.py")
 
-    if not analyzer_script.exists():
-        print(f"[task-logger] Error: {analyzer_script} not found", file=sys.stderr)
+    if analyzer_script is None:
+        print(f"[task-logger] Error: transcript-analyzer.py not found", file=sys.stderr)
         return 1
 
     # 解析に必要な情報を JSON で渡す
@@ -324,35 +557,7 @@ def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
     }
 
     try:
-        if sys.platform == "win32":
-            # Windows: 一時ファイル経由でデータを渡す（stdin問題回避）
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".json",
-                encoding="utf-8",
-                delete=False
-            ) as tmp_file:
-                json.dump(analyzer_input, tmp_file, ensure_ascii=False)
-                tmp_path = tmp_file.name
-
-            # CREATE_NEW_PROCESS_GROUP で親から切り離し
-            subprocess.Popen(
-                [sys.executable, str(analyzer_script), "--input-file", tmp_path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
-            )
-        else:
-            # Linux/Mac: nohup 相当、stdin で渡す
-            process = subprocess.Popen(
-                [sys.executable, str(analyzer_script)],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True
-            )
-            process.stdin.write(json.dumps(analyzer_input).encode("utf-8"))
-            process.stdin.close()
+        spawn_background_script(analyzer_script, analyzer_input)
     except Exception as e:
         print(f"[task-logger] Error starting analyzer: {e}", file=sys.stderr)
         return 1
@@ -360,7 +565,11 @@ def handle_subagent_stop(hook_input: dict[str, Any]) -> int:
     return 0
 
 
-def handle_stop(hook_input: dict[str, Any]) -> int:
+def handle_stop(
+    hook_input: dict[str, Any],
+    project_root: Path,
+    now: datetime
+) -> int:
     """
     Stop イベント処理（セッション終了）
 
@@ -368,6 +577,8 @@ def handle_stop(hook_input: dict[str, Any]) -> int:
 
     Args:
         hook_input: フックからの入力データ
+        project_root: プロジェクトルート
+        now: イベント受信時刻
 
     Returns:
         終了コード（0: 成功, 1: エラー）
@@ -378,14 +589,12 @@ def handle_stop(hook_input: dict[str, Any]) -> int:
 
     session_id = hook_input.get("session_id", "unknown")
     transcript_path = hook_input.get("transcript_path", "")
-    now = datetime.now()
 
     # バックグラウンドで session-summary.py を起動
-    project_root = get_project_root()
-    summary_script = project_root / ".claude" / "hooks" / "task-logging" / "session-summary.py"
+    summary_script = find_hook_script(project_root, "session-summary.py")
 
-    if not summary_script.exists():
-        print(f"[task-logger] Error: {summary_script} not found", file=sys.stderr)
+    if summary_script is None:
+        print(f"[task-logger] Error: session-summary.py not found", file=sys.stderr)
         return 1
 
     # transcriptからブランチ情報と開始時刻を取得（パス検証付き）
@@ -393,7 +602,7 @@ def handle_stop(hook_input: dict[str, Any]) -> int:
     start_ts = ""
     if transcript_path:
         expanded_path = os.path.expanduser(transcript_path)
-        allowed_prefixes = [os.path.expanduser("~"), str(project_root)]
+        allowed_prefixes = (_HOME, str(project_root))
         if is_safe_path(expanded_path, allowed_prefixes):
             try:
                 with open(expanded_path, "r", encoding="utf-8") as f:
@@ -418,34 +627,7 @@ def handle_stop(hook_input: dict[str, Any]) -> int:
     }
 
     try:
-        if sys.platform == "win32":
-            # Windows: 一時ファイル経由でデータを渡す
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".json",
-                encoding="utf-8",
-                delete=False
-            ) as tmp_file:
-                json.dump(summary_input, tmp_file, ensure_ascii=False)
-                tmp_path = tmp_file.name
-
-            subprocess.Popen(
-                [sys.executable, str(summary_script), "--input-file", tmp_path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
-            )
-        else:
-            # Linux/Mac: nohup 相当
-            process = subprocess.Popen(
-                [sys.executable, str(summary_script)],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True
-            )
-            process.stdin.write(json.dumps(summary_input).encode("utf-8"))
-            process.stdin.close()
+        spawn_background_script(summary_script, summary_input)
     except Exception as e:
         print(f"[task-logger] Error starting session-summary: {e}", file=sys.stderr)
         return 1
@@ -464,25 +646,28 @@ def main() -> int:
         終了コード
     """
     try:
-        # Windows環境でのエンコーディング問題対策
-        if sys.platform == "win32":
-            import io
-            sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
-        hook_input = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
+        # バイト列のまま json.loads に渡す
+        # （テキスト層を経由せず、Windows のコンソールエンコーディングの影響も受けない）
+        hook_input = json.loads(sys.stdin.buffer.read())
+    except ValueError as e:
+        # JSONDecodeError / UnicodeDecodeError
         print(f"[task-logger] Error: Invalid JSON input: {e}", file=sys.stderr)
         return 1
 
     event = hook_input.get("hook_event_name")
 
+    # プロジェクトルートと現在時刻はイベントごとに1回だけ取得して各ハンドラへ渡す
+    project_root = get_project_root()
+    now = datetime.now()
+
     if event == "PreToolUse":
-        return handle_pre_tool_use(hook_input)
+        return handle_pre_tool_use(hook_input, now)
     elif event == "UserPromptSubmit":
-        return handle_user_prompt_submit(hook_input)
+        return handle_user_prompt_submit(hook_input, project_root, now)
     elif event == "SubagentStop":
-        return handle_subagent_stop(hook_input)
+        return handle_subagent_stop(hook_input, project_root, now)
     elif event == "Stop":
-        return handle_stop(hook_input)
+        return handle_stop(hook_input, project_root, now)
     else:
         # 対象外のイベント
         return 0
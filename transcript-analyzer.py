@@ -5,32 +5,44 @@
 task-logger.py からバックグラウンドで起動され、
 transcript ファイルを解析して Markdown 形式のログを生成する。
 """
-import argparse
+import functools
+import io
+import itertools
 import json
+import mmap
 import os
 import sys
-import uuid
+import time
 from datetime import datetime
-from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
 # 共通設定をインポート
 from config import (
     INDEX_FILE,
     INDEX_LOCK_SUFFIX,
+    INDEX_OFFSETS_SUFFIX,
     LOG_BASE_DIR,
+    LOG_TMP_SUFFIX,
+    LOG_WRITE_BUFFER_BYTES,
     MAX_CONTENT_LENGTH,
     MAX_EVENTS,
     MAX_FILE_SIZE_MB,
     MAX_TOOL_INPUT_LENGTH,
     MAX_TOOL_RESULT_LENGTH,
-    FileLock,
+    get_file_lock,
     is_safe_path,
+    redact_head,
     redact_sensitive_data,
     sanitize_branch_name,
     sanitize_filename,
 )
 
+if TYPE_CHECKING:
+    import argparse
+
+# ホームディレクトリ（transcript パス検証の許可ディレクトリ）
+_HOME = os.path.expanduser("~")
+
 
 # =============================================================================
 # transcript 解析
@@ -52,9 +64,7 @@ def parse_transcript(transcript_path: str, project_root: str = "") -> list[dict[
     expanded_path = os.path.expanduser(transcript_path)
 
     # パス検証: ホームディレクトリまたはプロジェクトルート内のみ許可
-    allowed_prefixes = [os.path.expanduser("~")]
-    if project_root:
-        allowed_prefixes.append(project_root)
+    allowed_prefixes = (_HOME, project_root) if project_root else (_HOME,)
 
     if not is_safe_path(expanded_path, allowed_prefixes):
         print(f"[transcript-analyzer] Error: Path outside allowed directories: {expanded_path}", file=sys.stderr)
@@ -73,21 +83,42 @@ def parse_transcript(transcript_path: str, project_root: str = "") -> list[dict[
         pass
 
     try:
-        with open(expanded_path, "r", encoding="utf-8") as f:
-            for i, line in enumerate(f):
-                # 最大イベント数チェック
-                if i >= MAX_EVENTS:
-                    print(f"[transcript-analyzer] Warning: Truncated at {MAX_EVENTS} events", file=sys.stderr)
-                    break
-
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                    events.append(event)
-                except json.JSONDecodeError:
-                    continue
+        with open(expanded_path, "rb") as f:
+            # 空ファイルはメモリマップできない
+            if os.fstat(f.fileno()).st_size == 0:
+                return events
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # 改行位置を find（memchr）で求めて行を切り出す
+                # 行ごとの str 生成・UTF-8 デコードは json.loads に任せる
+                # ループ内で参照するグローバル・属性はローカル変数に束縛
+                max_events = MAX_EVENTS
+                find = mm.find
+                loads = json.loads
+                events_append = events.append
+                size = len(mm)
+                pos = 0
+                i = 0
+                while pos < size:
+                    # 最大イベント数チェック
+                    if i >= max_events:
+                        print(f"[transcript-analyzer] Warning: Truncated at {MAX_EVENTS} events", file=sys.stderr)
+                        break
+                    i += 1
+
+                    line_end = find(b"\n", pos)
+                    if line_end < 0:
+                        line_end = size
+                    line = mm[pos:line_end]
+                    pos = line_end + 1
+
+                    # json.loads は前後の空白を許容するため strip によるコピーは不要
+                    if not line or line.isspace():
+                        continue
+                    try:
+                        events_append(loads(line))
+                    except ValueError:
+                        # 不正な JSON・UTF-8 の行は読み飛ばす
+                        continue
     except OSError as e:
         print(f"[transcript-analyzer] Error reading transcript: {e}", file=sys.stderr)
 
@@ -110,6 +141,153 @@ def extract_git_branch(events: list[dict[str, Any]]) -> str:
     return ""
 
 
+def _collect_tool_result_text(result: list[Any]) -> str:
+    """
+    リスト形式の tool_result content からテキスト部分を結合
+
+    Args:
+        result: content 配列（画像等を含む場合）
+
+    Returns:
+        改行で結合したテキスト
+    """
+    text_parts = []
+    text_parts_append = text_parts.append
+    for item in result:
+        if isinstance(item, dict):
+            if item.get("type") == "text":
+                text_parts_append(item.get("text", ""))
+        elif isinstance(item, str):
+            text_parts_append(item)
+    return "\n".join(text_parts)
+
+
+def _append_tool_step(
+    steps: list[dict[str, Any]],
+    tool_uses: dict[str, dict[str, Any]],
+    tool_id: Any,
+    result: Any
+) -> None:
+    """
+    tool_result に対応する tool_use を引き当ててツールステップを追加
+
+    引き当てた tool_use は結果の処理済みとして tool_uses から取り除く
+    （長い transcript でも保持するのは結果待ちの tool_use のみ）。
+
+    Args:
+        steps: 実行ステップのリスト
+        tool_uses: tool_use_id -> tool_use 情報
+        tool_id: tool_result の tool_use_id
+        result: ツール結果
+    """
+    tool_info = tool_uses.pop(tool_id, None)
+    if tool_info is None:
+        tool_name = "Unknown"
+        tool_input = {}
+    else:
+        tool_name = tool_info.get("tool", "Unknown")
+        tool_input = tool_info.get("input", {})
+
+    # 結果を truncate
+    if isinstance(result, str) and len(result) > MAX_CONTENT_LENGTH:
+        result = result[:MAX_CONTENT_LENGTH] + "..."
+
+    steps.append({
+        "type": "tool",
+        "tool": tool_name,
+        "input": tool_input,
+        "result": result
+    })
+
+
+def _handle_assistant_event(
+    event: dict[str, Any],
+    tool_uses: dict[str, dict[str, Any]],
+    steps: list[dict[str, Any]]
+) -> None:
+    """assistantメッセージ内のcontent配列を解析（テキスト応答とツール使用）"""
+    steps_append = steps.append
+
+    for content in event.get("message", {}).get("content", []):
+        if not isinstance(content, dict):
+            continue
+
+        content_type = content.get("type")
+
+        # テキスト応答
+        if content_type == "text":
+            text = content.get("text", "")
+            if text:
+                steps_append({
+                    "type": "response",
+                    "content": text
+                })
+
+        # ツール使用
+        elif content_type == "tool_use":
+            tool_id = content.get("id", "")
+            if tool_id:
+                tool_uses[tool_id] = {
+                    "tool": content.get("name", "Unknown"),
+                    "input": content.get("input", {})
+                }
+
+
+def _handle_user_event(
+    event: dict[str, Any],
+    tool_uses: dict[str, dict[str, Any]],
+    steps: list[dict[str, Any]]
+) -> None:
+    """ツール結果（Claude Code形式: userメッセージ内にtool_resultがネスト）"""
+    for content in event.get("message", {}).get("content", []):
+        if not isinstance(content, dict) or content.get("type") != "tool_result":
+            continue
+
+        result = content.get("content", "")
+
+        # contentがリストの場合（画像等を含む場合）
+        if isinstance(result, list):
+            result = _collect_tool_result_text(result)
+
+        _append_tool_step(steps, tool_uses, content.get("tool_use_id", ""), result)
+
+
+def _handle_tool_result_event(
+    event: dict[str, Any],
+    tool_uses: dict[str, dict[str, Any]],
+    steps: list[dict[str, Any]]
+) -> None:
+    """旧形式: 直接 tool_result イベント"""
+    get = event.get
+    tool_id = get("toolUseId") or get("tool_id") or get("tool_use_id")
+    result = get("content") or get("result", "")
+    _append_tool_step(steps, tool_uses, tool_id, result)
+
+
+def _handle_tool_use_event(
+    event: dict[str, Any],
+    tool_uses: dict[str, dict[str, Any]],
+    steps: list[dict[str, Any]]
+) -> None:
+    """旧形式との互換性: 直接 tool_use イベント"""
+    get = event.get
+    tool_id = get("id") or get("tool_use_id")
+    if tool_id:
+        tool_uses[tool_id] = {
+            "tool": get("tool") or get("name"),
+            "input": get("input") or get("tool_input", {})
+        }
+
+
+# イベント種別 -> ハンドラ
+_EVENT_HANDLERS = {
+    "assistant": _handle_assistant_event,
+    "user": _handle_user_event,
+    "tool_result": _handle_tool_result_event,
+    "tool_use": _handle_tool_use_event,
+}
+
+
 def extract_execution_steps(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """
     transcript イベントから実行ステップを抽出
@@ -126,111 +304,15 @@ def extract_execution_steps(events: list[dict[str, Any]]) -> list[dict[str, Any]
     """
     steps: list[dict[str, Any]] = []
     tool_uses: dict[str, dict[str, Any]] = {}  # tool_use_id -> tool_use イベント
+    get_handler = _EVENT_HANDLERS.get
 
     for event in events:
-        event_type = event.get("type")
-
-        # Claude Code サブエージェント形式: assistantメッセージ内のcontent配列を解析
-        if event_type == "assistant":
-            message = event.get("message", {})
-            content_list = message.get("content", [])
-
-            for content in content_list:
-                if not isinstance(content, dict):
-                    continue
-
-                content_type = content.get("type")
-
-                # テキスト応答
-                if content_type == "text":
-                    text = content.get("text", "")
-                    if text:
-                        steps.append({
-                            "type": "response",
-                            "content": text
-                        })
-
-                # ツール使用
-                elif content_type == "tool_use":
-                    tool_id = content.get("id", "")
-                    tool_name = content.get("name", "Unknown")
-                    tool_input = content.get("input", {})
-
-                    if tool_id:
-                        tool_uses[tool_id] = {
-                            "tool": tool_name,
-                            "input": tool_input
-                        }
-
-        # ツール結果（Claude Code形式: userメッセージ内にtool_resultがネスト）
-        elif event_type == "user":
-            message = event.get("message", {})
-            content_list = message.get("content", [])
-
-            for content in content_list:
-                if not isinstance(content, dict):
-                    continue
-
-                if content.get("type") == "tool_result":
-                    tool_id = content.get("tool_use_id", "")
-                    result = content.get("content", "")
-
-                    # contentがリストの場合（画像等を含む場合）
-                    if isinstance(result, list):
-                        text_parts = []
-                        for item in result:
-                            if isinstance(item, dict) and item.get("type") == "text":
-                                text_parts.append(item.get("text", ""))
-                            elif isinstance(item, str):
-                                text_parts.append(item)
-                        result = "\n".join(text_parts)
-
-                    tool_info = tool_uses.get(tool_id, {})
-                    tool_name = tool_info.get("tool", "Unknown")
-                    tool_input = tool_info.get("input", {})
-
-                    # 結果を truncate
-                    if isinstance(result, str) and len(result) > MAX_CONTENT_LENGTH:
-                        result = result[:MAX_CONTENT_LENGTH] + "..."
-
-                    steps.append({
-                        "type": "tool",
-                        "tool": tool_name,
-                        "input": tool_input,
-                        "result": result
-                    })
-
-        # 旧形式: 直接 tool_result イベント
-        elif event_type == "tool_result":
-            tool_id = event.get("toolUseId") or event.get("tool_id") or event.get("tool_use_id")
-            result = event.get("content") or event.get("result", "")
-
-            tool_info = tool_uses.get(tool_id, {})
-            tool_name = tool_info.get("tool", "Unknown")
-            tool_input = tool_info.get("input", {})
-
-            # 結果を truncate
-            if isinstance(result, str) and len(result) > MAX_CONTENT_LENGTH:
-                result = result[:MAX_CONTENT_LENGTH] + "..."
-
-            steps.append({
-                "type": "tool",
-                "tool": tool_name,
-                "input": tool_input,
-                "result": result
-            })
-
-        # 旧形式との互換性: 直接 tool_use イベント
-        elif event_type == "tool_use":
-            tool_id = event.get("id") or event.get("tool_use_id")
-            tool_name = event.get("tool") or event.get("name")
-            tool_input = event.get("input") or event.get("tool_input", {})
+        handler = get_handler(event.get("type"))
+        if handler is not None:
+            handler(event, tool_uses, steps)
 
-            if tool_id:
-                tool_uses[tool_id] = {
-                    "tool": tool_name,
-                    "input": tool_input
-                }
+    # 結果が来なかった tool_use は不要
+    tool_uses.clear()
 
     return steps
 
@@ -268,18 +350,41 @@ def escape_code_block(text: str) -> str:
     return text.replace("```", "` ` `")
 
 
-def generate_markdown_log(
+def compute_duration_ms(start_ts: str, end_ts: str) -> int | None:
+    """
+    開始・終了時刻から実行時間を算出
+
+    Args:
+        start_ts: 開始時刻（ISO 8601形式）
+        end_ts: 終了時刻（ISO 8601形式）
+
+    Returns:
+        実行時間（ミリ秒、算出できない場合はNone）
+    """
+    try:
+        start_dt = datetime.fromisoformat(start_ts)
+        end_dt = datetime.fromisoformat(end_ts)
+        return int((end_dt - start_dt).total_seconds() * 1000)
+    except Exception:
+        return None
+
+
+def render_markdown_log(
+    out: io.TextIOBase,
     session_info: dict[str, Any],
     steps: list[dict[str, Any]],
     final_response: str,
     start_ts: str,
-    end_ts: str,
+    duration_ms: int | None,
     transcript_path: str
-) -> str:
+) -> None:
     """
-    Markdown 形式のログを生成
+    Markdown 形式のログを出力ストリームへ書き出す
+
+    ログ全体を文字列として組み立てず、セクションごとに直接書き込む。
 
     Args:
+        out: 出力先のテキストストリーム
         session_info: セッション情報（開始時の情報）
             - subagent: サブエージェント名
             - description: タスクの説明
@@ -288,55 +393,45 @@ def generate_markdown_log(
         steps: 実行ステップのリスト（extract_execution_steps の出力）
         final_response: 最終応答テキスト
         start_ts: 開始時刻（ISO 8601形式）
-        end_ts: 終了時刻（ISO 8601形式）
+        duration_ms: 実行時間（ミリ秒、算出できない場合はNone）
         transcript_path: 元の transcript ファイルパス
-
-    Returns:
-        Markdown 形式のログ文字列
     """
     subagent = session_info.get("subagent", "Unknown")
     description = session_info.get("description", "")
     prompt = session_info.get("prompt", "")
     model = session_info.get("model") or "default"
 
-    # 実行時間計算
-    duration_str = ""
-    try:
-        start_dt = datetime.fromisoformat(start_ts)
-        end_dt = datetime.fromisoformat(end_ts)
-        duration_sec = (end_dt - start_dt).total_seconds()
-        duration_str = f"{duration_sec:.1f}秒"
-    except Exception:
-        duration_str = "不明"
+    # 実行時間（インデックスに記録する値と同じものを表示）
+    duration_str = f"{duration_ms / 1000:.1f}秒" if duration_ms is not None else "不明"
 
     # Markdown 生成
-    lines: list[str] = []
-    lines.append(f"# Agent Log: {subagent}")
-    lines.append("")
-    lines.append("## メタ情報")
-    lines.append("")
-    lines.append("| 項目 | 値 |")
-    lines.append("|------|-----|")
-    lines.append(f"| 実行日時 | {start_ts} |")
-    lines.append(f"| サブエージェント | {subagent} |")
-    lines.append(f"| モデル | {model} |")
-    lines.append(f"| 実行時間 | {duration_str} |")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## タスク内容")
-    lines.append("")
+    w = out.write
+    w(f"# Agent Log: {subagent}\n")
+    w("\n")
+    w("## メタ情報\n")
+    w("\n")
+    w("| 項目 | 値 |\n")
+    w("|------|-----|\n")
+    w(f"| 実行日時 | {start_ts} |\n")
+    w(f"| サブエージェント | {subagent} |\n")
+    w(f"| モデル | {model} |\n")
+    w(f"| 実行時間 | {duration_str} |\n")
+    w("\n")
+    w("---\n")
+    w("\n")
+    w("## タスク内容\n")
+    w("\n")
     if description:
-        lines.append(f"**説明**: {description}")
-        lines.append("")
-    lines.append("```")
-    lines.append(escape_code_block(prompt))
-    lines.append("```")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## 実行過程")
-    lines.append("")
+        w(f"**説明**: {description}\n")
+        w("\n")
+    w("```\n")
+    w(f"{escape_code_block(prompt)}\n")
+    w("```\n")
+    w("\n")
+    w("---\n")
+    w("\n")
+    w("## 実行過程\n")
+    w("\n")
 
     # ツール使用ステップを出力
     tool_steps = [s for s in steps if s.get("type") == "tool"]
@@ -346,48 +441,42 @@ def generate_markdown_log(
             tool_input = step.get("input", {})
             tool_result = step.get("result", "")
 
-            lines.append(f"### {i}. [{tool_name}]")
-            lines.append("")
+            w(f"### {i}. [{tool_name}]\n\n")
 
             # 入力パラメータ（サイズ制限・機密情報マスキング付き）
             if tool_input:
-                lines.append("**入力:**")
-                lines.append("```json")
+                w("**入力:**\n```json\n")
                 try:
                     input_json = json.dumps(tool_input, ensure_ascii=False, indent=2)
-                    # 機密情報をマスキング
-                    input_json = redact_sensitive_data(input_json)
-                    if len(input_json) > MAX_TOOL_INPUT_LENGTH:
-                        input_json = input_json[:MAX_TOOL_INPUT_LENGTH] + "\n... (truncated)"
-                    lines.append(input_json)
+                    # 表示されない部分はマスキング前に切り捨て、機密情報をマスキング
+                    input_json, truncated = redact_head(input_json, MAX_TOOL_INPUT_LENGTH)
+                    if truncated:
+                        input_json += "\n... (truncated)"
+                    w(f"{input_json}\n")
                 except Exception:
-                    input_str = str(tool_input)
-                    input_str = redact_sensitive_data(input_str)
-                    if len(input_str) > MAX_TOOL_INPUT_LENGTH:
-                        input_str = input_str[:MAX_TOOL_INPUT_LENGTH] + "... (truncated)"
-                    lines.append(input_str)
-                lines.append("```")
-                lines.append("")
+                    input_str, truncated = redact_head(str(tool_input), MAX_TOOL_INPUT_LENGTH)
+                    if truncated:
+                        input_str += "... (truncated)"
+                    w(f"{input_str}\n")
+                w("```\n\n")
 
             # 結果（エスケープ処理・機密情報マスキング適用）
             if tool_result:
-                lines.append("**結果:**")
-                lines.append("```")
-                result_str = redact_sensitive_data(str(tool_result))
-                result_str = escape_code_block(result_str)
-                lines.append(result_str[:MAX_TOOL_RESULT_LENGTH])
-                if len(result_str) > MAX_TOOL_RESULT_LENGTH:
-                    lines.append("... (truncated)")
-                lines.append("```")
-                lines.append("")
+                w("**結果:**\n```\n")
+                result_str, truncated = redact_head(str(tool_result), MAX_TOOL_RESULT_LENGTH, escape_code_block)
+                if truncated:
+                    w(f"{result_str}\n... (truncated)\n")
+                else:
+                    w(f"{result_str}\n")
+                w("```\n\n")
     else:
-        lines.append("(ツール使用なし)")
-        lines.append("")
+        w("(ツール使用なし)\n")
+        w("\n")
 
-    lines.append("---")
-    lines.append("")
-    lines.append("## 最終結果")
-    lines.append("")
+    w("---\n")
+    w("\n")
+    w("## 最終結果\n")
+    w("\n")
     # final_responseのMarkdown特殊文字をエスケープ・機密情報マスキング
     # ---が行頭にある場合、Markdownの水平線と誤認されるのを防ぐ
     escaped_response = final_response
@@ -400,108 +489,354 @@ def generate_markdown_log(
             escaped_response = "\\---" + escaped_response[3:]
         # コードブロックのエスケープ
         escaped_response = escape_code_block(escaped_response)
-    lines.append(escaped_response)
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-    lines.append("## 参照")
-    lines.append("")
-    lines.append(f"- Transcript: `{transcript_path}`")
-    lines.append("")
+    w(f"{escaped_response}\n")
+    w("\n")
+    w("---\n")
+    w("\n")
+    w("## 参照\n")
+    w("\n")
+    w(f"- Transcript: `{transcript_path}`\n")
+
+
+def generate_markdown_log(
+    session_info: dict[str, Any],
+    steps: list[dict[str, Any]],
+    final_response: str,
+    start_ts: str,
+    end_ts: str,
+    transcript_path: str
+) -> str:
+    """
+    Markdown 形式のログを文字列として生成
 
-    return "\n".join(lines)
+    引数は render_markdown_log と同じ（out を除き、duration_ms の代わりに終了時刻 end_ts を受け取る）。
+
+    Returns:
+        Markdown 形式のログ文字列
+    """
+    buf = io.StringIO()
+    render_markdown_log(
+        buf, session_info, steps, final_response,
+        start_ts, compute_duration_ms(start_ts, end_ts), transcript_path
+    )
+    return buf.getvalue()
 
 
 # =============================================================================
 # ファイル出力
 # =============================================================================
+# 1回の writev に渡せるバッファ数の上限
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 16  # POSIX で保証される最小値
+if _IOV_MAX <= 0:
+    _IOV_MAX = 16
+
+
+class _GatherWriter(io.TextIOBase):
+    """
+    書き込まれた文字列を UTF-8 のチャンクのまま溜め、まとめて書き込むライター
+
+    チャンクを1つのバッファへコピー・結合せず、os.writev（ギャザー書き込み）で
+    複数のチャンクを1回のシステムコールで書き込む。
+    os.writev が無い環境（Windows）では結合して os.write する。
+    改行は変換しない（常に LF）。
+    """
+
+    def __init__(self, fd: int) -> None:
+        super().__init__()
+        self._fd = fd
+        self._chunks: list[bytes] = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8")
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= LOG_WRITE_BUFFER_BYTES or len(self._chunks) >= _IOV_MAX:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        chunks = self._chunks
+        if not chunks:
+            return
+        self._chunks = []
+        self._size = 0
+
+        if not hasattr(os, "writev"):
+            data = memoryview(b"".join(chunks))
+            while data:
+                data = data[os.write(self._fd, data):]
+            return
+
+        start = 0
+        while start < len(chunks):
+            written = os.writev(self._fd, chunks[start:])
+            # 部分書き込みの場合は書き込めた分を読み飛ばして続ける
+            while start < len(chunks) and written >= len(chunks[start]):
+                written -= len(chunks[start])
+                start += 1
+            if written:
+                chunks[start] = chunks[start][written:]
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+            super().close()
+
+
+# ファイル内容のみをディスクへ書き出す関数（fdatasync が無い環境では fsync）
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+# このプロセスで作成（存在を確認）済みのディレクトリ
+_known_dirs: set[str] = set()
+
+
+def _fast_mkdir_p(path: str) -> None:
+    """
+    ディレクトリを作成（既に存在する場合は何もしない）
+
+    os.makedirs は親ディレクトリの存在確認（stat）を先に行うため、
+    既存ディレクトリが大半の場合はまず mkdir を1回だけ試し、
+    親が無い場合のみ os.makedirs で再帰的に作成する。
+    一度確認したディレクトリは以降システムコールを発行しない。
+
+    Args:
+        path: 作成するディレクトリのパス
+    """
+    if path in _known_dirs:
+        return
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(path, exist_ok=True)
+    _known_dirs.add(path)
+
+
+# ログファイル名の一意化用の連番（同一秒・同一サブエージェントの衝突回避）
+_log_file_counter = itertools.count()
+
+# 直近に整形した時刻（秒単位）とその HHMMSS 文字列
+_last_hms_sec = -1
+_last_hms = ""
+
+
+def _current_hms() -> str:
+    """
+    現在時刻を HHMMSS 形式で返す
+
+    同じ秒の間は前回整形した文字列を再利用し、strftime を秒ごとに1回に抑える。
+
+    Returns:
+        HHMMSS 形式の現在時刻
+    """
+    global _last_hms_sec, _last_hms
+
+    sec = int(time.time())
+    if sec != _last_hms_sec:
+        _last_hms = time.strftime("%H%M%S", time.localtime(sec))
+        _last_hms_sec = sec
+    return _last_hms
+
+
 def write_markdown_log(
     project_root: str,
     date_str: str,
     session_id: str,
     subagent: str,
-    content: str,
+    render: Callable[[io.TextIOBase], None],
     branch: str = ""
 ) -> str:
     """
-    Markdown ログをファイルに書き込み
+    Markdown ログを一時ファイル（ログファイルパス + LOG_TMP_SUFFIX）に書き込み
+
+    ログファイルパスへの公開は commit_log により、インデックスへの追記と
+    同じロック内で行う（インデックスには公開済みのログのみが載る）。
 
     Args:
-        project_root: プロジェクトルート
+        project_root: プロジェクトルート（正規化済みの絶対パス）
         date_str: 日付文字列
         session_id: セッションID
         subagent: サブエージェント名
-        content: Markdown 内容
+        render: 開いたファイルへ Markdown 内容を書き出す関数
         branch: Gitブランチ名（オプション）
 
     Returns:
-        書き込んだファイルパス（失敗時は空文字列）
+        公開先のログファイルパス（失敗時は空文字列）
     """
-    # パスを正規化（Windows対応）
-    project_root = os.path.normpath(project_root)
-
     # ブランチ別ディレクトリ構造: 日付/ブランチ/
+    # （os.path.join を使わず連結する。プロジェクトルートが "/" などの場合に
+    #   区切り文字が重複しないよう、末尾の区切り文字は除いておく）
+    sep = os.sep
+    log_dir = f"{project_root.rstrip(sep)}{sep}{LOG_BASE_DIR}{sep}{date_str}"
     if branch:
-        safe_branch = sanitize_branch_name(branch)
-        log_dir = os.path.join(project_root, LOG_BASE_DIR, date_str, safe_branch)
-    else:
-        log_dir = os.path.join(project_root, LOG_BASE_DIR, date_str)
-    os.makedirs(log_dir, exist_ok=True)
+        log_dir = f"{log_dir}{sep}{sanitize_branch_name(branch)}"
+    _fast_mkdir_p(log_dir)
 
     # サブエージェント名をサニタイズ（パストラバーサル防止）
     safe_subagent = sanitize_filename(subagent)
 
-    # タイムスタンプ + UUID でユニークにする（同一秒の衝突を回避）
-    timestamp = datetime.now().strftime("%H%M%S")
-    unique_id = uuid.uuid4().hex[:8]
-    log_file = os.path.join(log_dir, f"{timestamp}_{safe_subagent}_{unique_id}.md")
+    # タイムスタンプ + 連番でユニークにする（同一秒の衝突を回避）
+    # 一時ファイルを O_EXCL で作成し、他のプロセスが使用中・公開済みの名前と
+    # 衝突した場合は次の連番で作り直す（公開は一時ファイルからの rename のみのため、
+    # 一時ファイルを確保した後にログファイルが無ければ、その名前は他と衝突しない）
+    timestamp = _current_hms()
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    log_file = ""
+    tmp_file = ""
+    try:
+        while True:
+            unique_id = f"{next(_log_file_counter):08x}"
+            log_file = f"{log_dir}{sep}{timestamp}_{safe_subagent}_{unique_id}.md"
+            tmp_file = log_file + LOG_TMP_SUFFIX
+            try:
+                fd = os.open(tmp_file, flags, 0o644)
+            except FileExistsError:
+                continue
+            if not os.path.exists(log_file):
+                break
+            os.close(fd)
+            os.remove(tmp_file)
+    except OSError as e:
+        print(f"[transcript-analyzer] Error writing log: {log_file}: {e}", file=sys.stderr)
+        return ""
 
     try:
-        with open(log_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        # 作成したディスクリプタへ、チャンクをまとめて直接書き込む
+        with _GatherWriter(fd) as f:
+            render(f)
+            f.flush()
+            # 公開（rename）後に内容が欠けたログが見えないよう、先にディスクへ書き出す
+            _fdatasync(fd)
         return log_file
     except OSError as e:
         print(f"[transcript-analyzer] Error writing log: {log_file}: {e}", file=sys.stderr)
     except Exception as e:
         print(f"[transcript-analyzer] Unexpected error writing log: {e}", file=sys.stderr)
+
+    # 書きかけのログを残さない
+    try:
+        os.remove(tmp_file)
+    except OSError:
+        pass
     return ""
 
 
-def write_index_entry(
+def _append_bytes(path: str, data: bytes) -> int:
+    """
+    O_APPEND で開いたファイルにバイト列を追記
+
+    ファイルオブジェクト（バッファ層）を介さず os.write で書き込む。
+    追記位置は書き込み後のファイル位置から求めるため、事前の fstat は不要。
+
+    Args:
+        path: 追記するファイルのパス
+        data: 追記するバイト列
+
+    Returns:
+        書き込みを開始したバイトオフセット
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        return os.lseek(fd, 0, os.SEEK_CUR) - len(data)
+    finally:
+        os.close(fd)
+
+
+def _file_size(path: str) -> int:
+    """
+    ファイルサイズを返す（存在しない場合は0）
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        ファイルサイズ（バイト）
+    """
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+# インデックス行のエンコーダ
+# （json.dumps は既定以外の引数を渡すと呼び出しごとにエンコーダを生成するため使い回す）
+_index_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+def _publish_log(log_path: str) -> bool:
+    """
+    一時ファイルに書き込んだ Markdown ログをログファイルパスへ公開
+
+    Args:
+        log_path: write_markdown_log が返したログファイルパス
+
+    Returns:
+        公開できた場合True
+    """
+    tmp_path = log_path + LOG_TMP_SUFFIX
+    try:
+        os.replace(tmp_path, log_path)
+        return True
+    except OSError as e:
+        print(f"[transcript-analyzer] Error publishing log: {log_path}: {e}", file=sys.stderr)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def commit_log(
+    log_path: str,
     project_root: str,
     date_str: str,
     session_id: str,
     subagent: str,
     start_ts: str,
     end_ts: str,
+    duration_ms: int | None,
     log_file: str,
     branch: str = ""
 ) -> None:
     """
-    インデックスファイルにエントリを追加（ファイルロック付き）
+    書き込み済みの Markdown ログを公開し、インデックスにエントリを追加
+
+    1回のロック取得で、Markdown ログの公開（一時ファイルからの rename）と
+    インデックスへの追記を行い、同じロック内でオフセット索引（index.jsonl.idx）に
+    (セッションID, バイトオフセット, バイト長) を追記する。
+    追記に失敗した場合はインデックスと索引を追記前の長さに戻す
+    （ログは公開済みのまま、インデックスには登録しない）。
 
     Args:
-        project_root: プロジェクトルート
+        log_path: write_markdown_log が返したログファイルパス
+        project_root: プロジェクトルート（正規化済みの絶対パス）
         date_str: 日付文字列
         session_id: セッションID
         subagent: サブエージェント名
         start_ts: 開始時刻
         end_ts: 終了時刻
-        log_file: ログファイルパス
+        duration_ms: 実行時間（ミリ秒、算出できない場合はNone）
+        log_file: インデックスに記録するログファイルパス（LOG_BASE_DIR からの相対パス）
         branch: Gitブランチ名（オプション）
     """
-    index_file = os.path.join(os.path.normpath(project_root), INDEX_FILE)
+    index_file = f"{project_root.rstrip(os.sep)}{os.sep}{INDEX_FILE}"
     lock_file = index_file + INDEX_LOCK_SUFFIX
-    os.makedirs(os.path.dirname(index_file), exist_ok=True)
-
-    # 実行時間計算
-    duration_ms = None
-    try:
-        start_dt = datetime.fromisoformat(start_ts)
-        end_dt = datetime.fromisoformat(end_ts)
-        duration_ms = int((end_dt - start_dt).total_seconds() * 1000)
-    except Exception:
-        pass
+    offsets_file = index_file + INDEX_OFFSETS_SUFFIX
 
     entry = {
         "date": date_str,
@@ -514,74 +849,131 @@ def write_index_entry(
         "status": "success",
         "log_file": log_file
     }
-    entry_line = json.dumps(entry, ensure_ascii=False) + "\n"
+    entry_line = (_index_encoder.encode(entry) + "\n").encode("utf-8")
+    # セッションIDはJSON文字列として記録（タブ・改行を含んでも行が壊れない）
+    session_key = _index_encoder.encode(session_id)
 
     try:
-        with FileLock(lock_file, timeout=10.0):
-            with open(index_file, "a", encoding="utf-8") as f:
-                f.write(entry_line)
+        _fast_mkdir_p(os.path.dirname(index_file))
+        with get_file_lock(lock_file, timeout=10.0):
+            if not _publish_log(log_path):
+                return
+            index_size = _file_size(index_file)
+            offsets_size = _file_size(offsets_file)
+            try:
+                # エンコード済みのバイト列を os.write で追記（テキスト層を経由しない）
+                offset = _append_bytes(index_file, entry_line)
+                _append_bytes(offsets_file, f"{session_key}\t{offset}\t{len(entry_line)}\n".encode("utf-8"))
+            except OSError:
+                # インデックスと索引の片方だけ（または途中まで）追記された状態を残さないよう、
+                # 両方を追記前の長さに戻す
+                for path, size in ((index_file, index_size), (offsets_file, offsets_size)):
+                    try:
+                        os.truncate(path, size)
+                    except OSError:
+                        pass
+                raise
     except TimeoutError:
         print(f"[transcript-analyzer] Warning: Failed to acquire index lock (timeout)", file=sys.stderr)
+        # インデックスには登録できないが、ログ自体は公開しておく
+        _publish_log(log_path)
     except OSError as e:
         print(f"[transcript-analyzer] Error writing index: {e}", file=sys.stderr)
 
 
 # =============================================================================
-# メイン処理
-# =============================================================================
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> "argparse.ArgumentParser":
+    """コマンドライン引数パーサーを生成（結果をキャッシュ）"""
+    # process を直接呼ぶ場合は不要なため、使う時だけインポート
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcript analyzer for subagent logs")
+    parser.add_argument(
+        "--input-file",
+        type=str,
+        help="Path to input JSON file (if not specified, reads from stdin)"
+    )
+    return parser
+
+
 def main() -> int:
     """
     メイン処理
 
-    --input-file オプションまたは stdin から JSON を受け取り、
-    transcript を解析して Markdown ログを生成
+    --input-file オプションまたは stdin から JSON を受け取り、process に渡す
 
     Returns:
         終了コード
     """
     # 引数解析
-    parser = argparse.ArgumentParser(description="Transcript analyzer for subagent logs")
-    parser.add_argument(
-        "--input-file",
-        type=str,
-        help="Path to input JSON file (if not specified, reads from stdin)"
-    )
-    args = parser.parse_args()
+    args = _build_parser().parse_args()
 
     # 入力を読み取り
     input_file_path = None
     try:
         if args.input_file:
             input_file_path = args.input_file
-            with open(input_file_path, "r", encoding="utf-8") as f:
-                input_data = json.load(f)
+            # バイト列のまま json.loads に渡す（テキスト層を経由しない）
+            with open(input_file_path, "rb") as f:
+                input_data = json.loads(f.read())
         else:
-            input_data = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
+            input_data = json.loads(sys.stdin.buffer.read())
+    except ValueError as e:
+        # JSONDecodeError / UnicodeDecodeError
         print(f"[transcript-analyzer] Error: Invalid JSON input: {e}", file=sys.stderr)
         return 1
     except OSError as e:
         print(f"[transcript-analyzer] Error reading input file: {e}", file=sys.stderr)
         return 1
     finally:
-        # 一時ファイルを削除
-        if input_file_path and os.path.exists(input_file_path):
+        # 一時ファイルを削除（存在確認はせず、無ければ無視）
+        if input_file_path:
             try:
                 os.remove(input_file_path)
             except OSError:
                 pass
 
+    return process(input_data)
+
+
+def process(input_data: dict[str, Any]) -> int:
+    """
+    入力データをもとに transcript を解析して Markdown ログを生成
+
+    引数解析・入力読み取りを含まないため、常駐プロセスからも
+    イベントごとに繰り返し呼び出せる。
+
+    Args:
+        input_data: task-logger.py から渡される入力データ
+            - session_id: セッションID
+            - transcript_path: サブエージェントの transcript パス
+            - session_info: セッション情報（開始時の情報）
+            - project_root: プロジェクトルート
+            - end_ts: 終了時刻（ISO 8601形式）
+
+    Returns:
+        終了コード
+    """
     session_id = input_data.get("session_id", "unknown")
     transcript_path = input_data.get("transcript_path", "")
     session_info = input_data.get("session_info", {})
     project_root = input_data.get("project_root", ".")
     end_ts = input_data.get("end_ts", datetime.now().isoformat())
 
-    # project_root の検証
-    project_root = os.path.realpath(os.path.normpath(project_root))
+    # project_root の検証（解決は1回のみ行い、以降は解決済みのパスを渡す）
+    # 検証しない場合（CLAUDE_PROJECT_DIR 未設定）はシンボリックリンクの解決は不要
+    requested_root = project_root
     allowed_root = os.environ.get("CLAUDE_PROJECT_DIR")
-    if allowed_root:
-        allowed_root = os.path.realpath(os.path.normpath(allowed_root))
+    if not allowed_root:
+        project_root = os.path.abspath(requested_root)
+    else:
+        project_root = os.path.realpath(os.path.normpath(requested_root))
+        # 通常は同じ文字列が渡されるため、その場合は再解決しない
+        if allowed_root == requested_root:
+            allowed_root = project_root
+        else:
+            allowed_root = os.path.realpath(os.path.normpath(allowed_root))
         if project_root != allowed_root:
             print(f"[transcript-analyzer] Error: Invalid project_root", file=sys.stderr)
             return 1
@@ -604,42 +996,47 @@ def main() -> int:
     steps = extract_execution_steps(events)
     final_response = get_final_response(steps)
 
-    # Markdown 生成
-    markdown_content = generate_markdown_log(
-        session_info=session_info,
-        steps=steps,
-        final_response=final_response,
-        start_ts=start_ts,
-        end_ts=end_ts,
-        transcript_path=transcript_path
-    )
+    # 実行時間計算（ログ本文とインデックスで共用）
+    duration_ms = compute_duration_ms(start_ts, end_ts)
 
-    # ファイル書き込み（ブランチ別ディレクトリ）
+    # Markdown 生成・ファイル書き込み（ブランチ別ディレクトリ）
+    # ログ全体を文字列にせず、開いたファイルへ直接書き出す
     log_file = write_markdown_log(
         project_root=project_root,
         date_str=date_str,
         session_id=session_id,
         subagent=subagent,
-        content=markdown_content,
+        render=functools.partial(
+            render_markdown_log,
+            session_info=session_info,
+            steps=steps,
+            final_response=final_response,
+            start_ts=start_ts,
+            duration_ms=duration_ms,
+            transcript_path=transcript_path
+        ),
         branch=git_branch
     )
 
-    # インデックス更新
+    # ログの公開・インデックス更新
     if log_file:
-        # 相対パスに変換
-        try:
-            relative_log_file = str(Path(log_file).relative_to(Path(project_root) / LOG_BASE_DIR))
-        except ValueError:
+        # 相対パスに変換（log_file は同じ接頭辞から組み立てているため文字列操作で十分）
+        log_base_prefix = f"{project_root.rstrip(os.sep)}{os.sep}{LOG_BASE_DIR}{os.sep}"
+        if log_file.startswith(log_base_prefix):
+            relative_log_file = log_file.removeprefix(log_base_prefix)
+        else:
             # フォールバック: ファイル名のみ使用
-            relative_log_file = Path(log_file).name
+            relative_log_file = os.path.basename(log_file)
 
-        write_index_entry(
+        commit_log(
+            log_path=log_file,
             project_root=project_root,
             date_str=date_str,
             session_id=session_id,
             subagent=subagent,
             start_ts=start_ts,
             end_ts=end_ts,
+            duration_ms=duration_ms,
             log_file=relative_log_file,
             branch=git_branch
         )